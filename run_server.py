@@ -1,17 +1,53 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from termcolor import colored
 import subprocess
 import sys
 import os
 import socket
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
-def is_port_in_use(port):
-    """Check if a port is already in use."""
+# ANSI color codes, resolved once at startup. Colors are turned off when NO_COLOR is set
+# or stdout isn't a terminal.
+_USE_COLOR = "NO_COLOR" not in os.environ and sys.stdout.isatty()
+_COLOR_CODES = {
+    "red": "\x1b[31m",
+    "green": "\x1b[32m",
+    "yellow": "\x1b[33m",
+    "cyan": "\x1b[36m",
+}
+_RESET = "\x1b[0m"
+
+def colored(text, color):
+    """Wrap text in the ANSI codes for a color."""
+    if not _USE_COLOR:
+        return text
+    return f"{_COLOR_CODES[color]}{text}{_RESET}"
+
+def is_port_in_use(host, port, timeout=0.1):
+    """
+    Check if a port is already in use.
+    
+    First tries to bind the port (with SO_REUSEADDR so sockets in TIME_WAIT don't count),
+    then tries a short connect. The port is in use if it can't be bound or if something answers.
+    """
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex(('localhost', port)) == 0
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind((host, port))
+            s.listen(1)
+            bindable = True
+        except (socket.error, OverflowError):
+            bindable = False
+    
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            reachable = True
+    except (socket.error, OverflowError):
+        reachable = False
+    
+    return not bindable or reachable
 
 def parse_arguments():
     """Parse command-line arguments."""
@@ -51,11 +87,18 @@ if __name__ == "__main__":
         server_port = 3000
         client_port = 5173
         
-        if is_port_in_use(server_port):
+        # Probe both ports concurrently so a slow connect doesn't add up
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ports_in_use = dict(zip(
+                [server_port, client_port],
+                executor.map(lambda port: is_port_in_use('localhost', port), [server_port, client_port])
+            ))
+        
+        if ports_in_use[server_port]:
             print(colored(f"[DockerMCP] Warning: Port {server_port} (MCP server) is already in use.", "yellow"))
             print(colored("[DockerMCP] You may need to stop other running MCP servers or services using this port.", "yellow"))
         
-        if is_port_in_use(client_port):
+        if ports_in_use[client_port]:
             print(colored(f"[DockerMCP] Warning: Port {client_port} (MCP Inspector client) is already in use.", "yellow")) 
             print(colored("[DockerMCP] You may need to stop other running MCP Inspector instances.", "yellow"))
         
@@ -1,14 +1,27 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import collections
 import subprocess
+import functools
+import hashlib
+import shutil
 from fastmcp import FastMCP
-from termcolor import colored
 import sys
 import os
 import shlex  # Add shlex for proper command splitting
 import json
 import logging
+import re
+import secrets
+import time
+import urllib.parse
+
+try:
+    import httpx  # Installed with fastmcp; without it every call goes through the docker CLI
+except ImportError:
+    httpx = None
 
 # Set up logging to stderr for MCP compatibility
 logging.basicConfig(
@@ -17,36 +30,817 @@ logging.basicConfig(
     stream=sys.stderr
 )
 
+# httpx logs every request at INFO level, which would drown out the tool logs
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 # CONSTANTS
 SERVER_NAME = "DockerManager"
 
+# ANSI color codes, resolved once at startup. Colors are turned off when NO_COLOR is set
+# or stderr isn't a terminal.
+_USE_COLOR = "NO_COLOR" not in os.environ and sys.stderr.isatty()
+_COLOR_CODES = {
+    "red": "\x1b[31m",
+    "green": "\x1b[32m",
+    "yellow": "\x1b[33m",
+    "blue": "\x1b[34m",
+    "magenta": "\x1b[35m",
+    "cyan": "\x1b[36m",
+}
+if not _USE_COLOR:
+    _COLOR_CODES = dict.fromkeys(_COLOR_CODES, "")
+_RESET = "\x1b[0m" if _USE_COLOR else ""
+# Color code + default prefix for each color, so the common case is a single concatenation
+_DEFAULT_HEADS = {color: f"{code}[DockerMCP] " for color, code in _COLOR_CODES.items()}
+# Log level used for each color, so standard logging config can filter the tool messages
+_COLOR_LEVELS = {"red": logging.ERROR, "yellow": logging.WARNING}
+
+class _ColorFormatter(logging.Formatter):
+    """Format 'dockermcp' records as '<prefix> <message>' in the color passed by print_colored."""
+    
+    def format(self, record):
+        color = getattr(record, "color", "green")
+        prefix = getattr(record, "prefix", "[DockerMCP]")
+        if prefix == "[DockerMCP]":
+            head = _DEFAULT_HEADS[color]
+        else:
+            head = f"{_COLOR_CODES[color]}{prefix} "
+        return f"{head}{record.getMessage()}{_RESET}"
+
+# The tool messages get their own stderr handler and don't propagate to the root logger,
+# so each message is written exactly once
+_log = logging.getLogger("dockermcp")
+_log_handler = logging.StreamHandler(sys.stderr)
+_log_handler.setFormatter(_ColorFormatter())
+_log.addHandler(_log_handler)
+_log.setLevel(logging.INFO)
+_log.propagate = False
+
 def print_colored(message, color="green", prefix="[DockerMCP]"):
     """Print colored messages to stderr for better compatibility with MCP protocol."""
     # Use stderr only to avoid interfering with stdout JSON communication
-    print(colored(f"{prefix} {message}", color), file=sys.stderr)
+    _log.log(_COLOR_LEVELS.get(color, logging.INFO), message, extra={"color": color, "prefix": prefix})
 
 # Create an MCP server instance
 mcp = FastMCP(SERVER_NAME, disable_stdout_logging=True)
 
-# When the server starts, check if Docker is available
-try:
-    docker_check = subprocess.run(
-        ["docker", "--version"], 
-        capture_output=True, 
-        text=True
+# Absolute path of the docker CLI, resolved once so each spawn skips the PATH search.
+# Falls back to plain "docker" so a CLI installed after startup is still found.
+_DOCKER = shutil.which("docker") or "docker"
+
+# Python opens its own fds non-inheritable (PEP 446), so children don't need the
+# close-all-fds pass that close_fds=True costs on every spawn.
+_SPAWN_KWARGS = {"close_fds": False}
+
+@functools.lru_cache(maxsize=1)
+def _docker_available() -> str:
+    """
+    Check that the Docker CLI is installed and return its version string.
+    
+    The result is cached, so only the first tool call pays for the 'docker --version'
+    subprocess. A failed check is not cached and will be retried on the next call.
+    Setting DOCKER_MCP_SKIP_PROBE skips the check entirely (e.g. for test suites).
+    """
+    if os.environ.get("DOCKER_MCP_SKIP_PROBE"):
+        return "unknown (probe skipped)"
+    
+    docker_path = shutil.which(_DOCKER)
+    if not docker_path:
+        raise RuntimeError("Docker is not available. Please make sure Docker is installed and running.")
+    
+    argv = [docker_path, "--version"]
+    with subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_SPAWN_KWARGS) as proc:
+        # The output is one short line that fits in the pipe buffer, so wait for the process
+        # first and then take each stream with a single bounded read instead of communicate()
+        try:
+            returncode = proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            raise
+        stdout = proc.stdout.read(4096)
+        stderr = proc.stderr.read(4096)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, argv, output=stdout, stderr=stderr)
+    
+    docker_version = stdout.decode("utf-8", errors="replace").strip()
+    print_colored(f"Docker version: {docker_version}", "cyan")
+    return docker_version
+
+async def _ensure_docker():
+    """
+    Run the Docker CLI check without blocking the event loop.
+    
+    The first check spawns 'docker --version' and waits for it, so it runs in a worker thread;
+    once it has succeeded the cached result is used directly.
+    """
+    if _docker_available.cache_info().currsize:
+        return
+    await asyncio.to_thread(_docker_available)
+
+# docker CLI argv prefixes, built once instead of as new lists on every call
+_DOCKER_EXEC_STDIN = (_DOCKER, "exec", "-i")
+_DOCKER_RUN_DETACHED = (_DOCKER, "run", "-d", "--name")
+_DOCKER_RM_F = (_DOCKER, "rm", "-f")
+_DOCKER_INSPECT_RUNNING = (_DOCKER, "container", "inspect", "-f", "{{.State.Running}}")
+_DOCKER_IMAGE_INSPECT = (_DOCKER, "image", "inspect")
+_DOCKER_PULL = (_DOCKER, "pull", "--quiet")
+
+# Long-lived 'docker exec -i <container> sh' processes, keyed by container name.
+# Reusing one shell per container avoids paying the docker exec startup cost on every call.
+# Each session has its own random end-of-output sentinel, so command output can't fake it,
+# and a lock so concurrent tool calls don't interleave on the same shell.
+_Session = collections.namedtuple("_Session", ["process", "sentinel", "status_line"])
+_sessions = {}
+_session_locks = {}
+# Containers whose image has no sh (e.g. distroless images). Their commands run with one
+# 'docker exec' each, the way they would without sessions.
+_shell_less_containers = set()
+
+# Package managers the install tools know how to use, in order of preference
+_PACKAGE_MANAGERS = ("npm", "pip", "apt-get", "apk")
+
+# Install argv for each package manager; the package names are appended after the "--"
+_INSTALL_ARGV = {
+    "npm": ("npm", "install", "-g", "--"),
+    "pip": ("pip", "install", "--"),
+    "apt-get": ("apt-get", "install", "-y", "--"),
+    "apk": ("apk", "add", "--no-cache", "--"),
+}
+
+# Line printed by the chained install script to report which package manager it used
+_USED_PM_MARKER = "__MCP_PACKAGE_MANAGER__="
+_USED_PM_RE = re.compile(re.escape(_USED_PM_MARKER) + r"([\w-]+)")
+
+# Docker's own rule for container names
+_CONTAINER_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,127}")
+# Shell operators that never appear in a package name or version specifier
+_DEPENDENCY_METACHARS = re.compile(r"[;&|`$]")
+
+def _invalid_input(container_name=None, image=None, deps=()):
+    """
+    Return an error message (also printed) if a tool argument can never be valid, else None.
+    
+    These checks run before any docker call, so requests that docker would reject anyway
+    don't pay for a CLI or API round trip.
+    """
+    if container_name is not None and not _CONTAINER_NAME_RE.fullmatch(container_name):
+        error_msg = (
+            f"Invalid container name '{container_name}': use letters, digits, '_', '.' and '-', "
+            "starting with a letter or digit (at most 128 characters)"
+        )
+    elif image is not None and (not image or image != image.strip() or " " in image):
+        error_msg = f"Invalid image name '{image}'"
+    else:
+        bad = [dep for dep in deps if _DEPENDENCY_METACHARS.search(dep)]
+        if not bad:
+            return None
+        error_msg = f"Invalid dependencies (shell operators are not allowed): {' '.join(bad)}"
+    print_colored(error_msg, "red")
+    return error_msg
+
+# Characters that need shlex to split a command correctly (quotes, escapes and shell operators)
+_SHELL_METACHARS = re.compile(r"[\"'\\$`|&;<>()]")
+
+# python -c invocations, whose code payload must stay a single argument
+_PYTHON_DASH_C = re.compile(r"^\s*(python[0-9.]*)\s+-c\s+(.*)$", re.DOTALL)
+
+def _split_command(command):
+    """
+    Split an execute_code command into argv.
+    
+    An unquoted python -c payload is kept as a single argument, plain whitespace-separated
+    commands use str.split(), and anything else (including quoted payloads) goes through shlex.
+    Raises ValueError for commands shlex can't parse (e.g. an unclosed quote).
+    """
+    match = _PYTHON_DASH_C.match(command)
+    if match and not match.group(2).startswith(("'", '"')):
+        cmd_parts = [match.group(1), "-c", match.group(2).strip()]
+        print_colored(f"Detected Python code execution: {cmd_parts}", "cyan")
+        return cmd_parts
+    if not _SHELL_METACHARS.search(command):
+        return command.split()
+    return shlex.split(command)
+
+async def _get_session(container_name):
+    """Return a running shell session for the container, starting a new one if needed."""
+    session = _sessions.get(container_name)
+    if session is None or session.process.returncode is not None:
+        process = await asyncio.create_subprocess_exec(
+            *_DOCKER_EXEC_STDIN, container_name, "sh",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            **_SPAWN_KWARGS
+        )
+        marker = f"__MCP_DONE_{secrets.token_hex(8)}__"
+        session = _Session(
+            process=process,
+            sentinel=f"\n{marker}".encode(),
+            # Printed after each command: a newline, the sentinel and the command's exit code
+            status_line=f"printf '\\n{marker}%s\\n' \"$?\"\n".encode(),
+        )
+        _sessions[container_name] = session
+    return session
+
+async def _close_session(container_name):
+    """Terminate the cached shell session for the container, if there is one."""
+    session = _sessions.pop(container_name, None)
+    if session is None:
+        return
+    process = session.process
+    try:
+        process.stdin.close()
+        process.terminate()
+        await asyncio.wait_for(process.wait(), timeout=5)
+    except ProcessLookupError:
+        pass
+    except asyncio.TimeoutError:
+        await _kill_process(process)
+
+async def _kill_process(proc):
+    """Kill a subprocess that ran past its deadline and reap it."""
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass
+    await proc.wait()
+
+def _error_message(label, error):
+    """Turn an exception from a docker call into the message returned to the client."""
+    if isinstance(error, subprocess.CalledProcessError):
+        stderr = error.stderr or b""
+        return f"Error {label}: {stderr.decode('utf-8', errors='replace')}"
+    if isinstance(error, (subprocess.TimeoutExpired, asyncio.TimeoutError)):
+        return f"Timeout while {label}. Operation took too long."
+    return f"Unexpected error: {str(error)}"
+
+async def _exec(argv, *, timeout, capture_stdout=True, capture_stderr=True):
+    """
+    Run a command without blocking the event loop and return (returncode, stdout, stderr).
+    
+    Output is returned as bytes. With capture_stdout=False or capture_stderr=False that
+    stream goes to /dev/null instead of a pipe and is returned as b"".
+    The process is killed if it doesn't finish within the timeout, and asyncio.TimeoutError is raised.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE if capture_stderr else asyncio.subprocess.DEVNULL,
+        **_SPAWN_KWARGS
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill_process(proc)
+        raise
+    return proc.returncode, stdout or b"", stderr or b""
+
+async def _run_docker(argv, *, timeout, label, capture_stdout=True):
+    """
+    Run a docker CLI command and return (ok, text).
+    
+    text is the decoded stdout on success, or an error message built from the label
+    (e.g. "creating container") on failure. The error is also printed once here.
+    Pass capture_stdout=False for commands whose output isn't used; only stderr is read then.
+    """
+    try:
+        await _ensure_docker()
+        returncode, stdout, stderr = await _exec(argv, timeout=timeout, capture_stdout=capture_stdout)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, argv, output=stdout, stderr=stderr)
+        return True, stdout.decode("utf-8", errors="replace")
+    except Exception as e:
+        error_msg = _error_message(label, e)
+        print_colored(error_msg, "red")
+        return False, error_msg
+
+# Only the first 4KB and the last 16KB of an install's output (stderr included) are kept
+_INSTALL_OUTPUT_LIMIT = (4096, 16384)
+
+async def _run_install(container_name, install_argv, deps):
+    """
+    Run an install command through the container's shell session and return (ok, text).
+    
+    Using the session means the container is set up with a single 'docker exec' that later
+    execute_code / execute_python_script calls keep reusing, instead of a one-off exec for the
+    install followed by another one for the session. If the install is an 'sh -c' script and
+    the container turns out to have no sh, deps are installed by _install_without_shell instead.
+    """
+    needs_shell = install_argv[0] == "sh"
+    if needs_shell and container_name in _shell_less_containers:
+        return await _install_without_shell(container_name, deps)
+    try:
+        await _ensure_docker()
+        return True, await _session_exec(
+            container_name, install_argv,
+            timeout=180,  # Allow more time for installations
+            output_limit=_INSTALL_OUTPUT_LIMIT
+        )
+    except subprocess.CalledProcessError as e:
+        if needs_shell and container_name in _shell_less_containers:
+            return await _install_without_shell(container_name, deps)
+        error = e
+    except Exception as e:
+        error = e
+    error_msg = _error_message("installing dependencies", error)
+    print_colored(error_msg, "red")
+    return False, error_msg
+
+async def _install_without_shell(container_name, deps):
+    """
+    Install deps in a container that has no sh and return (ok, text), like _run_install.
+    
+    Without sh there is no single 'command -v' script, so every package manager is probed
+    with its own '<pm> --version' exec, all at once, and the first one found runs the install
+    directly. The output starts with the same package manager marker the install scripts print.
+    """
+    results = await asyncio.gather(
+        *(_exec_once(container_name, (pm, "--version"), timeout=10) for pm in _PACKAGE_MANAGERS),
+        return_exceptions=True
+    )
+    pm = next(
+        (pm for pm, result in zip(_PACKAGE_MANAGERS, results)
+         if not isinstance(result, BaseException) and result[1] == 0),
+        None
+    )
+    if pm is None:
+        error_msg = "Error installing dependencies: No supported package managers found in the container"
+        print_colored(error_msg, "red")
+        return False, error_msg
+    
+    print_colored(f"No sh in container '{container_name}', installing with {pm} directly", "yellow")
+    install = (*_INSTALL_ARGV[pm], *deps)
+    # apt-get's index update can't be chained into the install without sh, so it's a separate exec
+    steps = (("apt-get", "update"), install) if pm == "apt-get" else (install,)
+    outputs = [f"{_USED_PM_MARKER}{pm}\n"]
+    for argv in steps:
+        ok, output = await _run_in_session(
+            container_name, argv,
+            timeout=180, label="installing dependencies", output_limit=_INSTALL_OUTPUT_LIMIT
+        )
+        if not ok:
+            return False, output
+        outputs.append(output)
+    return True, "".join(outputs)
+
+async def _run_in_session(container_name, cmd_parts, *, timeout, label, stdin_text=None, output_limit=None):
+    """Like _run_docker, but runs the command through the container's shell session."""
+    try:
+        await _ensure_docker()
+        return True, await _session_exec(
+            container_name, cmd_parts, timeout, stdin_text=stdin_text, output_limit=output_limit
+        )
+    except Exception as e:
+        error_msg = _error_message(label, e)
+        print_colored(error_msg, "red")
+        return False, error_msg
+
+def _docker_context_host(config_dir):
+    """
+    Return the daemon address of the docker CLI's current context, or None for the default one.
+    
+    Like the CLI, DOCKER_CONTEXT is used first and then currentContext from the CLI config.
+    Raises LookupError if a context is selected but its endpoint can't be read.
+    """
+    context = os.environ.get("DOCKER_CONTEXT")
+    if not context:
+        try:
+            with open(os.path.join(config_dir, "config.json"), encoding="utf-8") as f:
+                context = json.load(f).get("currentContext")
+        except (OSError, ValueError, AttributeError):
+            context = None
+    if not context or context == "default":
+        return None
+    
+    # Context metadata lives in a directory named after the SHA-256 of the context name
+    meta_path = os.path.join(
+        config_dir, "contexts", "meta", hashlib.sha256(context.encode()).hexdigest(), "meta.json"
+    )
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)["Endpoints"]["docker"]["Host"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise LookupError(f"can't read the endpoint of docker context '{context}'") from e
+
+def _docker_socket_path():
+    """
+    Return the unix socket of the daemon the docker CLI uses, or None if it isn't a local socket.
+    
+    The API must talk to the same daemon as the CLI (exec sessions, pulls and fallbacks always go
+    through the CLI), so this follows the CLI's choice: DOCKER_HOST, else the current docker
+    context (e.g. Docker Desktop, rootless or colima daemons), else the default socket.
+    """
+    host = os.environ.get("DOCKER_HOST", "")
+    if not host:
+        config_dir = os.environ.get("DOCKER_CONFIG") or os.path.join(os.path.expanduser("~"), ".docker")
+        try:
+            host = _docker_context_host(config_dir) or ""
+        except LookupError as e:
+            print_colored(f"Using the docker CLI only: {str(e)}", "yellow")
+            return None
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    if host:
+        return None  # tcp:// or ssh:// hosts are left to the docker CLI
+    return "/var/run/docker.sock"
+
+@functools.lru_cache(maxsize=1)
+def _api_client():
+    """
+    Return the shared Docker Engine API client, or None if the API can't be used.
+    
+    Talking to the daemon's unix socket directly saves the fork/exec and Go start-up of a
+    docker CLI process on every call, and the client keeps its connection alive between calls.
+    Setting DOCKER_MCP_NO_API forces the docker CLI for everything.
+    """
+    socket_path = _docker_socket_path()
+    if httpx is None or os.environ.get("DOCKER_MCP_NO_API") or not socket_path or not os.access(socket_path, os.R_OK | os.W_OK):
+        return None
+    return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=socket_path), base_url="http://docker")
+
+async def _docker_api(method, path, *, timeout, label, params=None, body=None, fallback_statuses=(), ok_statuses=()):
+    """
+    Call the Docker Engine API and return (ok, data), like _run_docker.
+    
+    data is the decoded JSON response (None for empty responses) on success, or an error
+    message built from the label on failure. Returns None instead when the API can't be
+    reached, or answers with one of fallback_statuses, so the caller can use the docker CLI.
+    Error statuses in ok_statuses count as success, with data None.
+    """
+    client = _api_client()
+    if client is None:
+        return None
+    try:
+        response = await client.request(method, path, params=params, json=body, timeout=timeout)
+    except httpx.TimeoutException:
+        error_msg = _error_message(label, asyncio.TimeoutError())
+        print_colored(error_msg, "red")
+        return False, error_msg
+    except httpx.TransportError:
+        return None  # e.g. no permission on the socket: the docker CLI may still work
+    
+    if response.status_code in fallback_statuses:
+        return None
+    if response.status_code in ok_statuses:
+        return True, None
+    if response.is_success:
+        return True, (response.json() if response.content else None)
+    
+    try:
+        message = response.json().get("message", response.text)
+    except ValueError:
+        message = response.text
+    error_msg = f"Error {label}: {message.strip()}"
+    print_colored(error_msg, "red")
+    return False, error_msg
+
+def _api_path(template, name, safe=""):
+    """Fill a container or image name into an API path, escaping it for the URL."""
+    return template.format(urllib.parse.quote(name, safe=safe))
+
+def _time_ago(timestamp):
+    """Describe a Unix timestamp the way 'docker ps' does in its CREATED column."""
+    seconds = max(0, int(time.time() - timestamp))
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = seconds // size
+            return f"{count} {unit}{'s' if count != 1 else ''} ago"
+    return f"{seconds} seconds ago"
+
+def _api_container_row(container):
+    """Convert a GET /containers/json entry to the fields of 'docker ps --format {{json .}}'."""
+    return {
+        "ID": container.get("Id", "")[:12],
+        "Names": ",".join(name.lstrip("/") for name in container.get("Names") or ()),
+        "Status": container.get("Status", ""),
+        "Image": container.get("Image", ""),
+        "RunningFor": _time_ago(container.get("Created", 0)),
+        "State": container.get("State", ""),
+    }
+
+# Recent "is this container running?" answers, keyed by container name: (checked_at, running).
+# Lets back-to-back tool calls on the same container skip the 'docker container inspect' probe.
+_running_cache = {}
+_RUNNING_CACHE_TTL = 2.0
+# Installs can trust the cache for longer: if the container has gone away since it was
+# seen running, the install's own 'docker exec' fails straight away with a clear error.
+_INSTALL_RUNNING_CACHE_TTL = 60.0
+
+async def _container_running(container_name, ttl=_RUNNING_CACHE_TTL):
+    """
+    Return whether the container exists and is running, using a short-lived cache.
+    
+    A live exec session already proves the container is running, so no probe is needed then.
+    If the probe itself fails (e.g. it times out) the container is assumed to be running
+    and the real docker call is left to report the error.
+    """
+    session = _sessions.get(container_name)
+    if session is not None and session.process.returncode is None:
+        return True
+    
+    now = time.monotonic()
+    cached = _running_cache.get(container_name)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    
+    client = _api_client()
+    if client is not None:
+        try:
+            response = await client.get(_api_path("/containers/{}/json", container_name), timeout=10)
+            running = response.is_success and bool(response.json()["State"]["Running"])
+        except (httpx.HTTPError, ValueError, KeyError, TypeError):
+            return True
+    else:
+        try:
+            returncode, stdout, _ = await _exec(
+                (*_DOCKER_INSPECT_RUNNING, container_name), timeout=10, capture_stderr=False
+            )
+        except Exception:
+            return True
+        running = returncode == 0 and stdout.strip() == b"true"
+    _running_cache[container_name] = (now, running)
+    return running
+
+def _not_running_message(container_name):
+    """Build (and print) the error returned when a tool targets a container that isn't running."""
+    error_msg = f"Container '{container_name}' is not running or does not exist"
+    print_colored(error_msg, "red")
+    return error_msg
+
+# Image name keywords and the image kind each one implies
+_IMAGE_KEYWORDS = {
+    "node": "node",
+    "javascript": "node",
+    "python": "python",
+    "ubuntu": "debian",
+    "debian": "debian",
+    "alpine": "alpine",
+}
+_IMAGE_RE = re.compile("|".join(_IMAGE_KEYWORDS), re.IGNORECASE)
+
+# Image kinds in order of precedence (e.g. "python:3-alpine" is a Python image), with a
+# description for the logs and the package manager that installs dependencies on them
+_IMAGE_INSTALLERS = {
+    "node": ("Node.js", "npm"),
+    "python": ("Python", "pip"),
+    "debian": ("Debian/Ubuntu", "apt-get"),
+    "alpine": ("Alpine", "apk"),
+}
+
+async def _image_present(image):
+    """
+    Return whether the image is in the local image store.
+    
+    This only looks at local images, so it's much cheaper than a pull, which always asks the
+    registry for the latest manifest. Any failure of the check counts as not present.
+    """
+    client = _api_client()
+    if client is not None:
+        try:
+            response = await client.get(_api_path("/images/{}/json", image, safe="/:@"), timeout=10)
+            return response.is_success
+        except httpx.HTTPError:
+            return False
+    try:
+        await _ensure_docker()
+        returncode, _, _ = await _exec(
+            (*_DOCKER_IMAGE_INSPECT, image), timeout=10, capture_stdout=False, capture_stderr=False
+        )
+    except Exception:
+        return False
+    return returncode == 0
+
+@functools.lru_cache(maxsize=256)
+def _classify_image(image):
+    """Classify an image name as 'node', 'python', 'debian', 'alpine' or 'unknown'."""
+    kinds = {_IMAGE_KEYWORDS[match.lower()] for match in _IMAGE_RE.findall(image)}
+    return next((kind for kind in _IMAGE_INSTALLERS if kind in kinds), "unknown")
+
+# Package manager that installs in each container have used, keyed by container name.
+# Only npm and pip are remembered; apt-get/apk installs can add new package managers.
+_package_manager_cache = {}
+
+def _install_shell_command(pm, deps):
+    """Return the sh command line that installs deps with the package manager, quoting each one."""
+    command = shlex.join((*_INSTALL_ARGV[pm], *deps))
+    if pm == "apt-get":
+        # apt-get needs its package index refreshed before installing
+        return f"apt-get update && {command}"
+    return command
+
+def _install_argv(pm, deps):
+    """
+    Return the argv that installs deps (a list of package names) with the package manager.
+    
+    The package names are passed as separate arguments, so no shell parses them. Only apt-get
+    goes through 'sh -c', to chain the index update before the install.
+    """
+    if pm == "apt-get":
+        return ("sh", "-c", _install_shell_command(pm, deps))
+    return (*_INSTALL_ARGV[pm], *deps)
+
+def _chained_install_argv(deps):
+    """
+    Build one 'sh -c' argv that installs deps with the first package manager found.
+    
+    Detection and install happen in the same 'docker exec', so there is no separate probe
+    round trip. The script exits with 127 if none of the package managers is available.
+    """
+    branches = [
+        f"command -v {pm} >/dev/null; then echo {_USED_PM_MARKER}{pm}; {_install_shell_command(pm, deps)}"
+        for pm in _PACKAGE_MANAGERS
+    ]
+    script = (
+        "if " + "; elif ".join(branches)
+        + "; else echo 'No supported package managers found in the container' >&2; exit 127; fi"
+    )
+    return ("sh", "-c", script)
+
+def _used_package_manager(output):
+    """Return the package manager reported by a chained install script's output, if any."""
+    match = _USED_PM_RE.search(output)
+    return match.group(1) if match else None
+
+async def _read_until_sentinel(reader, sentinel, output_limit=None):
+    """
+    Read session output up to the sentinel line and return (output, returncode).
+    
+    With output_limit=(head, tail), only the first head and the last tail bytes are kept, so
+    commands that print megabytes (e.g. package installs) use bounded memory; the omitted
+    middle is replaced by a one-line note.
+    """
+    buffer = bytearray()
+    omitted = 0
+    while True:
+        # Only rescan the tail that could contain a sentinel split across reads
+        search_from = max(0, len(buffer) - len(sentinel))
+        chunk = await reader.read(65536)
+        if not chunk:
+            # The shell exited (e.g. the container stopped) before finishing the command
+            return buffer, None
+        buffer += chunk
+        marker = buffer.find(sentinel, search_from)
+        if marker == -1:
+            if output_limit is not None:
+                head, tail = output_limit
+                excess = len(buffer) - head - max(tail, len(sentinel))
+                if excess > 0:
+                    del buffer[head:head + excess]
+                    omitted += excess
+            continue
+        end = buffer.find(b"\n", marker + len(sentinel))
+        while end == -1:
+            chunk = await reader.read(64)
+            if not chunk:
+                return buffer, None
+            buffer += chunk
+            end = buffer.find(b"\n", marker + len(sentinel))
+        returncode = int(buffer[marker + len(sentinel):end] or 1)
+        del buffer[marker:]
+        if output_limit is not None:
+            _trim_output(buffer, output_limit, omitted)
+        return buffer, returncode
+
+def _trim_output(buffer, output_limit, omitted=0):
+    """
+    Cut a bytearray down to its first head and last tail bytes, for output_limit=(head, tail).
+    
+    omitted is the number of bytes already dropped from the middle; if anything was dropped,
+    a one-line note with the total replaces it.
+    """
+    head, tail = output_limit
+    excess = len(buffer) - head - tail
+    if excess > 0:
+        del buffer[head:head + excess]
+        omitted += excess
+    if omitted:
+        buffer[head:head] = f"\n... [{omitted} bytes of output omitted] ...\n".encode()
+    return buffer
+
+async def _exec_once(container_name, cmd_parts, timeout, stdin_text=None, output_limit=None):
+    """
+    Run a command with its own 'docker exec' and return (output, returncode), like a session read.
+    
+    Used for containers without sh, which can't have a session. stderr is merged into the
+    output, and the command's stdin is stdin_text (or empty).
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *_DOCKER_EXEC_STDIN, container_name, *cmd_parts,
+        stdin=asyncio.subprocess.DEVNULL if stdin_text is None else asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        **_SPAWN_KWARGS
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(
+            proc.communicate(None if stdin_text is None else stdin_text.encode("utf-8")), timeout
+        )
+    except asyncio.TimeoutError:
+        await _kill_process(proc)
+        raise
+    buffer = bytearray(stdout)
+    if output_limit is not None:
+        _trim_output(buffer, output_limit)
+    return buffer, proc.returncode
+
+async def _session_exec(container_name, cmd_parts, timeout, stdin_text=None, output_limit=None):
+    """
+    Run a command in the container's shell session and return its output.
+    
+    The command is quoted and run with 'exec' in a subshell, so like a plain 'docker exec' it
+    runs as a program with the same argv: shell builtins (cd, export, exit, ...) fail with
+    "not found", and nothing a command does carries over to later commands. Its stderr is
+    merged into stdout, and the session's sentinel carrying the exit code marks the end of the
+    output. The command's stdin is /dev/null, or stdin_text fed through a quoted heredoc
+    in the same write.
+    Output is read as bytes and decoded once at the end; the CalledProcessError raised on a
+    non-zero exit code carries the raw bytes. Raises asyncio.TimeoutError if the sentinel
+    doesn't arrive in time (the session is discarded in that case).
+    output_limit=(head, tail) keeps only the start and end of the output (see _read_until_sentinel).
+    If 'docker exec' can't start sh in the container (exit code 126 or 127), the container is
+    remembered as having none and its commands run with _exec_once from then on. A command
+    that arrives while the session is busy with another one also runs with _exec_once, so
+    calls on the same container never queue up behind each other.
+    """
+    command = f"(exec {shlex.join(cmd_parts)})".encode()
+    if stdin_text is None:
+        script = command + b" </dev/null 2>&1\n"
+    else:
+        delimiter = f"__MCP_EOF_{secrets.token_hex(8)}__"
+        if not stdin_text.endswith("\n"):
+            stdin_text += "\n"
+        script = (
+            command + f" 2>&1 <<'{delimiter}'\n".encode()
+            + stdin_text.encode("utf-8") + f"{delimiter}\n".encode()
+        )
+    
+    buffer, returncode = b"", None
+    lock = _session_locks.setdefault(container_name, asyncio.Lock())
+    # Waiting for a busy session (e.g. behind a long install) wouldn't count against this
+    # call's timeout, so the command gets its own 'docker exec' instead
+    run_once = container_name in _shell_less_containers or lock.locked()
+    if not run_once:
+        async with lock:
+            session = await _get_session(container_name)
+            process = session.process
+            try:
+                process.stdin.write(script + session.status_line)
+                await process.stdin.drain()
+                buffer, returncode = await asyncio.wait_for(
+                    _read_until_sentinel(process.stdout, session.sentinel, output_limit), timeout
+                )
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            except asyncio.TimeoutError:
+                _sessions.pop(container_name, None)
+                await _kill_process(process)
+                raise
+            
+            if returncode is None:
+                # The session ended before the command finished
+                _sessions.pop(container_name, None)
+                try:
+                    exit_code = await asyncio.wait_for(process.wait(), 5)
+                except asyncio.TimeoutError:
+                    await _kill_process(process)
+                    exit_code = None
+                if exit_code in (126, 127):
+                    # docker exec couldn't start sh, so the command never ran
+                    print_colored(f"No sh in container '{container_name}', running commands with docker exec", "yellow")
+                    _shell_less_containers.add(container_name)
+                    run_once = True
+                elif not buffer:
+                    buffer = f"The container's shell session exited with code {exit_code}\n".encode()
+    
+    if run_once:
+        buffer, returncode = await _exec_once(container_name, cmd_parts, timeout, stdin_text, output_limit)
+    
+    if returncode is None:
+        raise subprocess.CalledProcessError(1, cmd_parts, output=bytes(buffer), stderr=bytes(buffer))
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd_parts, output=bytes(buffer), stderr=bytes(buffer))
+    # Decode straight from a view of the buffer instead of copying it into bytes first
+    return str(memoryview(buffer), "utf-8", "replace")
+
+# Columns shown by list_containers: (header, key in 'docker ps --format {{json .}}' output)
+_CONTAINER_COLUMNS = (
+    ("CONTAINER ID", "ID"),
+    ("NAMES", "Names"),
+    ("STATUS", "Status"),
+    ("IMAGE", "Image"),
+    ("CREATED", "RunningFor"),
+)
+
+def _format_container_table(rows):
+    """Render 'docker ps' JSON rows as an aligned text table."""
+    table = [[header for header, _ in _CONTAINER_COLUMNS]]
+    table.extend([str(row.get(key, "")) for _, key in _CONTAINER_COLUMNS] for row in rows)
+    widths = [max(len(line[i]) for line in table) for i in range(len(_CONTAINER_COLUMNS))]
+    return "\n".join(
+        "   ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip()
+        for line in table
     )
-    print_colored(f"Docker version: {docker_check.stdout.strip()}", "cyan")
-except subprocess.SubprocessError:
-    print_colored("Docker is not available. Please make sure Docker is installed and running.", "red")
-    logging.error("Docker is not available. Please make sure Docker is installed and running.")
-    sys.exit(1)
-except Exception as e:
-    print_colored(f"Error checking Docker: {str(e)}", "red")
-    logging.error(f"Error checking Docker: {str(e)}")
-    sys.exit(1)
 
 @mcp.tool()
-def create_container(image: str, container_name: str, dependencies: str = "") -> str:
+async def create_container(image: str, container_name: str, dependencies: str = "") -> str:
     """
     Create and start a Docker container with optional dependencies.
     
@@ -62,126 +856,113 @@ def create_container(image: str, container_name: str, dependencies: str = "") ->
     print_colored(f"Creating container with name '{container_name}' from image '{image}'...")
     
     try:
-        # Start the container in detached mode with an infinite sleep to keep it running.
-        result = subprocess.run(
-            ["docker", "run", "-d", "--name", container_name, image, "sleep", "infinity"],
-            capture_output=True, text=True, check=True, timeout=30
+        deps = shlex.split(dependencies)
+    except ValueError as e:
+        return f"Unexpected error: {str(e)}"
+    error_msg = _invalid_input(container_name, image, deps)
+    if error_msg:
+        return error_msg
+    
+    # Start the container in detached mode with an infinite sleep to keep it running.
+    # The API can't pull a missing image as part of create (404), so that case uses 'docker run'.
+    result = await _docker_api(
+        "POST", "/containers/create", params={"name": container_name},
+        body={"Image": image, "Cmd": ["sleep", "infinity"]},
+        timeout=30, label="creating container", fallback_statuses=(404,)
+    )
+    if result is not None:
+        ok, created = result
+        if not ok:
+            return created
+        container_id = created["Id"]
+        result = await _docker_api(
+            "POST", _api_path("/containers/{}/start", container_id),
+            timeout=30, label="creating container"
         )
-        container_id = result.stdout.strip()
-        print_colored(f"Container created successfully. ID: {container_id}")
-        
-        # Install dependencies if specified
-        if dependencies:
-            print_colored(f"Installing dependencies: {dependencies}", "cyan")
-            
-            # Determine package manager based on image
-            if "node" in image.lower() or "javascript" in image.lower():
-                # For Node.js images, use npm
-                print_colored("Detected Node.js image, using npm", "cyan")
-                # First check if npm is available
-                try:
-                    npm_check = subprocess.run(
-                        ["docker", "exec", container_name, "npm", "--version"],
-                        capture_output=True, text=True, check=True, timeout=10
-                    )
-                    print_colored(f"npm version: {npm_check.stdout.strip()}", "cyan")
-                    
-                    # For npm, we'll install packages globally to avoid needing a package.json
-                    install_cmd = f"npm install -g {dependencies}"
-                except subprocess.CalledProcessError:
-                    error_msg = "npm not found in container, defaulting to other package managers"
-                    print_colored(error_msg, "yellow")
-                    # Fall through to other package manager detection
-            elif "python" in image.lower():
-                # For Python images, use pip
-                print_colored("Detected Python image, using pip", "cyan")
-                install_cmd = f"pip install {dependencies}"
-            elif any(distro in image.lower() for distro in ["ubuntu", "debian"]):
-                # For Debian/Ubuntu images
-                print_colored("Detected Debian/Ubuntu image, using apt-get", "cyan")
-                install_cmd = f"apt-get update && apt-get install -y {dependencies}"
-            elif "alpine" in image.lower():
-                # For Alpine images
-                print_colored("Detected Alpine image, using apk", "cyan")
-                install_cmd = f"apk add --no-cache {dependencies}"
-            else:
-                # Default to pip for unknown images with a warning
-                print_colored("Image type not recognized, attempting to detect available package managers", "yellow")
-                
-                # Try to detect available package managers
-                package_managers = []
-                
-                # Check for npm
-                try:
-                    npm_check = subprocess.run(
-                        ["docker", "exec", container_name, "npm", "--version"],
-                        capture_output=True, text=True, check=False, timeout=5
-                    )
-                    if npm_check.returncode == 0:
-                        package_managers.append("npm")
-                except Exception:
-                    pass
-                
-                # Check for pip
-                try:
-                    pip_check = subprocess.run(
-                        ["docker", "exec", container_name, "pip", "--version"],
-                        capture_output=True, text=True, check=False, timeout=5
-                    )
-                    if pip_check.returncode == 0:
-                        package_managers.append("pip")
-                except Exception:
-                    pass
-                
-                # Choose package manager based on detection
-                if "npm" in package_managers:
-                    print_colored("npm found, using it for installation", "cyan")
-                    install_cmd = f"npm install -g {dependencies}"
-                elif "pip" in package_managers:
-                    print_colored("pip found, using it for installation", "cyan")
-                    install_cmd = f"pip install {dependencies}"
-                else:
-                    print_colored("No known package managers detected, defaulting to pip install", "yellow")
-                    install_cmd = f"pip install {dependencies}"
-            
-            try:
-                # Execute the installation command
-                print_colored(f"Running: {install_cmd}", "cyan")
-                install_result = subprocess.run(
-                    ["docker", "exec", container_name, "sh", "-c", install_cmd],
-                    capture_output=True, text=True, check=True, timeout=180  # Allow more time for installations
-                )
-                print_colored(f"Dependencies installed successfully", "green")
-                return f"Container created with ID: {container_id}\nDependencies installed: {dependencies}"
-            except subprocess.CalledProcessError as e:
-                error_msg = f"Error installing dependencies: {e.stderr}"
-                print_colored(error_msg, "red")
-                return f"Container created with ID: {container_id}\n{error_msg}"
-            except subprocess.TimeoutExpired:
-                error_msg = "Timeout while installing dependencies. Operation took too long."
-                print_colored(error_msg, "red")
-                return f"Container created with ID: {container_id}\n{error_msg}"
-            except Exception as e:
-                error_msg = f"Unexpected error installing dependencies: {str(e)}"
-                print_colored(error_msg, "red")
-                return f"Container created with ID: {container_id}\n{error_msg}"
-        
+        if result is None:
+            result = await _run_docker((_DOCKER, "start", container_id), timeout=30, label="creating container")
+        ok, output = result
+        if not ok:
+            return output
+    else:
+        ok, output = await _run_docker(
+            (*_DOCKER_RUN_DETACHED, container_name, image, "sleep", "infinity"),
+            timeout=30, label="creating container"
+        )
+        if not ok:
+            return output
+        container_id = output.strip()
+    print_colored(f"Container created successfully. ID: {container_id}")
+    # Drop anything cached for an earlier container that had the same name
+    _package_manager_cache.pop(container_name, None)
+    _shell_less_containers.discard(container_name)
+    _running_cache[container_name] = (time.monotonic(), True)
+    
+    if not deps:
         return f"Container created with ID: {container_id}"
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Error creating container: {e.stderr}"
-        print_colored(error_msg, "red")
-        return error_msg
-    except subprocess.TimeoutExpired:
-        error_msg = "Timeout while creating container. Operation took too long."
-        print_colored(error_msg, "red")
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print_colored(error_msg, "red")
+    
+    print_colored(f"Installing dependencies: {dependencies}", "cyan")
+    
+    # Determine package manager based on image
+    installer = _IMAGE_INSTALLERS.get(_classify_image(image))
+    if installer is None:
+        # Image type not recognized: let the container pick the first package manager it has
+        print_colored("Image type not recognized, using the first package manager found in the container", "yellow")
+        install_argv = _chained_install_argv(deps)
+    else:
+        description, pm = installer
+        print_colored(f"Detected {description} image, using {pm}", "cyan")
+        if pm == "npm":
+            # npm installs globally to avoid needing a package.json. The chained script prefers
+            # npm and falls back to the other package managers if the image doesn't have it.
+            install_argv = _chained_install_argv(deps)
+        else:
+            install_argv = _install_argv(pm, deps)
+    
+    print_colored(f"Running: {shlex.join(install_argv)}", "cyan")
+    ok, output = await _run_install(container_name, install_argv, deps)
+    if not ok:
+        return f"Container created with ID: {container_id}\n{output}"
+    
+    used = _used_package_manager(output)
+    if used:
+        print_colored(f"{used} found, used it for installation", "cyan")
+        if used in ("npm", "pip"):
+            _package_manager_cache[container_name] = used
+    print_colored("Dependencies installed successfully", "green")
+    return f"Container created with ID: {container_id}\nDependencies installed: {dependencies}"
+
+@mcp.tool()
+async def prewarm_image(image: str) -> str:
+    """
+    Make sure a Docker image is available locally, pulling it if needed.
+    
+    Parameters:
+    • image: The Docker image to fetch (e.g., "python:3.9-slim", "node:16").
+    
+    Call this ahead of create_container (e.g. while the user is still deciding what to run)
+    so the container starts without waiting for the image download. Images that are already
+    present locally are not pulled again.
+    """
+    error_msg = _invalid_input(image=image)
+    if error_msg:
         return error_msg
+    # Checked every time rather than remembered, since images can be removed (docker rmi,
+    # docker image prune) while the server runs
+    if await _image_present(image):
+        return f"Image '{image}' is already available locally."
+    
+    print_colored(f"Pulling image '{image}'...")
+    ok, output = await _run_docker(
+        (*_DOCKER_PULL, image), timeout=600, label="pulling image", capture_stdout=False
+    )
+    if not ok:
+        return output
+    print_colored(f"Image '{image}' pulled successfully")
+    return f"Image '{image}' has been pulled."
 
 @mcp.tool()
-def execute_code(container_name: str, command: str) -> str:
+async def execute_code(container_name: str, command: str) -> str:
     """
     Execute a command inside a running Docker container.
     
@@ -189,43 +970,35 @@ def execute_code(container_name: str, command: str) -> str:
     • container_name: The name of the target container.
     • command: The command to execute inside the container.
     
-    This tool uses 'docker exec' to run the command and returns the output.
+    This tool runs the command through a persistent 'docker exec' shell session for the
+    container and returns the output (stderr is included with stdout).
     """
     print_colored(f"Executing command in container '{container_name}': {command}")
+    error_msg = _invalid_input(container_name)
+    if error_msg:
+        return error_msg
     
     try:
-        # Check if this is a python -c command
-        if command.startswith("python -c"):
-            # For python -c commands, keep the entire string after -c as a single argument
-            prefix, python_code = command.split("-c", 1)
-            cmd_parts = ["python", "-c", python_code.strip()]
-            print_colored(f"Detected Python code execution: {cmd_parts}", "cyan")
-        else:
-            # For other commands, use proper shell-like splitting
-            cmd_parts = shlex.split(command)
-            
-        # Execute the command
-        result = subprocess.run(
-            ["docker", "exec", container_name] + cmd_parts,
-            capture_output=True, text=True, check=True, timeout=30
-        )
-        print_colored(f"Command executed successfully")
-        return f"Command output: {result.stdout}"
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Error executing command: {e.stderr}"
-        print_colored(error_msg, "red")
-        return error_msg
-    except subprocess.TimeoutExpired:
-        error_msg = "Timeout while executing command. Operation took too long."
-        print_colored(error_msg, "red")
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
+        cmd_parts = _split_command(command)
+    except ValueError as e:
+        return f"Unexpected error: {str(e)}"
+    if not cmd_parts:
+        error_msg = "Error executing command: no command given"
         print_colored(error_msg, "red")
         return error_msg
+    
+    if not await _container_running(container_name):
+        return _not_running_message(container_name)
+    
+    ok, output = await _run_in_session(container_name, cmd_parts, timeout=30, label="executing command")
+    if not ok:
+        return output
+    
+    print_colored("Command executed successfully")
+    return f"Command output: {output}"
 
 @mcp.tool()
-def execute_python_script(container_name: str, script_content: str, script_args: str = "") -> str:
+async def execute_python_script(container_name: str, script_content: str, script_args: str = "") -> str:
     """
     Execute a Python script inside a running Docker container.
     
@@ -234,127 +1007,78 @@ def execute_python_script(container_name: str, script_content: str, script_args:
     • script_content: The full Python script content to execute.
     • script_args: Optional arguments to pass to the script (default: "").
     
-    This tool writes the script to a file in the container and executes it.
+    This tool feeds the script to 'python -' on stdin through the container's persistent
+    shell session, so nothing is written to the container's filesystem.
     """
     print_colored(f"Executing Python script in container '{container_name}'")
-    script_path = "/tmp/script.py"
+    error_msg = _invalid_input(container_name)
+    if error_msg:
+        return error_msg
     
-    try:
-        # Write the script content to a file in the container
-        print_colored("Writing Python script to container...", "cyan")
-        # Escape single quotes in the script content
-        escaped_content = script_content.replace("'", "'\\''")
-        
-        write_result = subprocess.run(
-            ["docker", "exec", container_name, "bash", "-c", f"echo '{escaped_content}' > {script_path} && chmod +x {script_path}"],
-            capture_output=True, text=True, check=True, timeout=30
-        )
-        
-        # Execute the script
-        print_colored(f"Running Python script: {script_path} {script_args}", "cyan")
-        cmd_parts = ["python", script_path]
-        if script_args:
+    cmd_parts = ["python", "-"]
+    if not _SHELL_METACHARS.search(script_args):
+        # Plain "--flag value" style arguments only need whitespace splitting
+        cmd_parts.extend(script_args.split())
+    else:
+        try:
             cmd_parts.extend(shlex.split(script_args))
-            
-        result = subprocess.run(
-            ["docker", "exec", container_name] + cmd_parts,
-            capture_output=True, text=True, check=True, timeout=60  # Allow more time for script execution
-        )
-        
-        print_colored("Python script executed successfully")
-        return f"Command output: {result.stdout}"
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Error executing Python script: {e.stderr}"
-        print_colored(error_msg, "red")
-        return error_msg
-    except subprocess.TimeoutExpired:
-        error_msg = "Timeout while executing Python script. Operation took too long."
-        print_colored(error_msg, "red")
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print_colored(error_msg, "red")
-        return error_msg
+        except ValueError as e:
+            return f"Unexpected error: {str(e)}"
+    
+    if not await _container_running(container_name):
+        return _not_running_message(container_name)
+    
+    # Pass the script to Python on stdin through a quoted heredoc, so it needs no shell
+    # escaping, no intermediate file and no separate upload command
+    print_colored(f"Running Python script from stdin: python - {script_args}", "cyan")
+    ok, output = await _run_in_session(
+        container_name, cmd_parts, stdin_text=script_content,
+        timeout=60, label="executing Python script"  # Allow more time for script execution
+    )
+    if not ok:
+        return output
+    
+    print_colored("Python script executed successfully")
+    return f"Command output: {output}"
 
 @mcp.tool()
-def cleanup_container(container_name: str) -> str:
+async def cleanup_container(container_name: str) -> str:
     """
     Stop and remove a Docker container.
     
     Parameters:
     • container_name: The name of the container to stop and remove.
     
-    This tool uses 'docker stop' followed by 'docker rm' to clean up the container.
+    This tool uses 'docker rm -f', which stops and removes the container in a single call.
     """
     print_colored(f"Cleaning up container '{container_name}'...")
+    error_msg = _invalid_input(container_name)
+    if error_msg:
+        return error_msg
+    await _close_session(container_name)
+    _running_cache.pop(container_name, None)
+    _package_manager_cache.pop(container_name, None)
+    _shell_less_containers.discard(container_name)
     
-    try:
-        # Stop the container with a shorter timeout (5 seconds instead of default 10)
-        print_colored(f"Stopping container '{container_name}'...", "yellow")
-        stop_result = subprocess.run(
-            ["docker", "stop", "--time", "5", container_name],
-            capture_output=True, text=True, check=True, timeout=10
-        )
-        
-        # Remove the container
-        print_colored(f"Removing container '{container_name}'...", "yellow")
-        rm_result = subprocess.run(
-            ["docker", "rm", container_name],
-            capture_output=True, text=True, check=True, timeout=10
+    # A container that doesn't exist counts as removed, as it does for 'docker rm -f'
+    result = await _docker_api(
+        "DELETE", _api_path("/containers/{}", container_name), params={"force": "true"},
+        timeout=15, label="cleaning up container", ok_statuses=(404,)
+    )
+    if result is None:
+        result = await _run_docker(
+            (*_DOCKER_RM_F, container_name),
+            timeout=15, label="cleaning up container", capture_stdout=False
         )
-        
-        print_colored(f"Container '{container_name}' has been successfully stopped and removed.")
-        return f"Container '{container_name}' has been stopped and removed."
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Error cleaning the container: {e.stderr}"
-        print_colored(error_msg, "red")
-        
-        # If stop fails, try to force kill the container
-        try:
-            print_colored(f"Attempting to force kill container '{container_name}'...", "yellow")
-            kill_result = subprocess.run(
-                ["docker", "kill", container_name],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            rm_result = subprocess.run(
-                ["docker", "rm", "-f", container_name],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            if rm_result.returncode == 0:
-                print_colored(f"Container '{container_name}' has been forcibly removed.")
-                return f"Container '{container_name}' has been forcibly removed after timeout."
-        except Exception:
-            pass
-        
-        return error_msg
-    except subprocess.TimeoutExpired:
-        error_msg = "Timeout while cleaning up container. Attempting to force remove..."
-        print_colored(error_msg, "yellow")
-        
-        # If timeout occurs, try to force remove the container
-        try:
-            kill_result = subprocess.run(
-                ["docker", "kill", container_name],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            rm_result = subprocess.run(
-                ["docker", "rm", "-f", container_name],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            if rm_result.returncode == 0:
-                print_colored(f"Container '{container_name}' has been forcibly removed after timeout.")
-                return f"Container '{container_name}' has been forcibly removed after timeout."
-            else:
-                return "Failed to clean up container after timeout."
-        except Exception as e:
-            return f"Failed to force remove container: {str(e)}"
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print_colored(error_msg, "red")
-        return error_msg
+    ok, output = result
+    if not ok:
+        return output
+    
+    print_colored(f"Container '{container_name}' has been successfully stopped and removed.")
+    return f"Container '{container_name}' has been stopped and removed."
 
 @mcp.tool()
-def add_dependencies(container_name: str, dependencies: str) -> str:
+async def add_dependencies(container_name: str, dependencies: str) -> str:
     """
     Install additional dependencies in an existing Docker container.
     
@@ -362,124 +1086,50 @@ def add_dependencies(container_name: str, dependencies: str) -> str:
     • container_name: The name of the target container.
     • dependencies: Space-separated list of packages to install (e.g., "numpy pandas matplotlib" or "express lodash").
     
-    This tool automatically detects the appropriate package manager (pip, npm, apt, apk)
+    This tool automatically detects the appropriate package manager (npm, pip, apt, apk)
     available in the container and uses it to install the specified dependencies.
     """
     print_colored(f"Adding dependencies to container '{container_name}': {dependencies}")
     
     try:
-        # Check if container exists and is running
-        container_check = subprocess.run(
-            ["docker", "container", "inspect", "-f", "{{.State.Running}}", container_name],
-            capture_output=True, text=True, check=True, timeout=10
-        )
-        
-        if container_check.stdout.strip() != "true":
-            error_msg = f"Container '{container_name}' is not running or does not exist"
-            print_colored(error_msg, "red")
-            return error_msg
-        
-        # Try to detect available package managers
-        package_managers = []
-        
-        # Check for npm
-        try:
-            npm_check = subprocess.run(
-                ["docker", "exec", container_name, "npm", "--version"],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            if npm_check.returncode == 0:
-                package_managers.append("npm")
-                print_colored(f"Found npm: {npm_check.stdout.strip()}", "cyan")
-        except Exception:
-            pass
-        
-        # Check for pip
-        try:
-            pip_check = subprocess.run(
-                ["docker", "exec", container_name, "pip", "--version"],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            if pip_check.returncode == 0:
-                package_managers.append("pip")
-                print_colored(f"Found pip: {pip_check.stdout.strip()}", "cyan")
-        except Exception:
-            pass
-        
-        # Check for apt-get
-        try:
-            apt_check = subprocess.run(
-                ["docker", "exec", container_name, "apt-get", "--version"],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            if apt_check.returncode == 0:
-                package_managers.append("apt-get")
-                print_colored("Found apt-get", "cyan")
-        except Exception:
-            pass
-        
-        # Check for apk
-        try:
-            apk_check = subprocess.run(
-                ["docker", "exec", container_name, "apk", "--version"],
-                capture_output=True, text=True, check=False, timeout=5
-            )
-            if apk_check.returncode == 0:
-                package_managers.append("apk")
-                print_colored("Found apk", "cyan")
-        except Exception:
-            pass
-        
-        # Choose package manager based on detection
-        if not package_managers:
-            error_msg = "No supported package managers found in the container"
-            print_colored(error_msg, "red")
-            return error_msg
-        
-        print_colored(f"Available package managers: {', '.join(package_managers)}", "cyan")
-        
-        # Choose the appropriate package manager
-        if "npm" in package_managers:
-            print_colored("Using npm for installation", "cyan")
-            install_cmd = f"npm install -g {dependencies}"
-        elif "pip" in package_managers:
-            print_colored("Using pip for installation", "cyan")
-            install_cmd = f"pip install {dependencies}"
-        elif "apt-get" in package_managers:
-            print_colored("Using apt-get for installation", "cyan")
-            install_cmd = f"apt-get update && apt-get install -y {dependencies}"
-        elif "apk" in package_managers:
-            print_colored("Using apk for installation", "cyan")
-            install_cmd = f"apk add --no-cache {dependencies}"
-        else:
-            error_msg = "No supported package managers found in the container"
-            print_colored(error_msg, "red")
-            return error_msg
-        
-        # Execute the installation command
-        print_colored(f"Running: {install_cmd}", "cyan")
-        install_result = subprocess.run(
-            ["docker", "exec", container_name, "sh", "-c", install_cmd],
-            capture_output=True, text=True, check=True, timeout=180  # Allow more time for installations
-        )
-        
-        print_colored("Dependencies installed successfully", "green")
-        return f"Dependencies installed in container '{container_name}': {dependencies}"
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Error installing dependencies: {e.stderr}"
-        print_colored(error_msg, "red")
-        return error_msg
-    except subprocess.TimeoutExpired:
-        error_msg = "Timeout while installing dependencies. Operation took too long."
-        print_colored(error_msg, "red")
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print_colored(error_msg, "red")
+        deps = shlex.split(dependencies)
+    except ValueError as e:
+        return f"Unexpected error: {str(e)}"
+    error_msg = _invalid_input(container_name, deps=deps)
+    if error_msg:
         return error_msg
+    
+    # Check if container exists and is running
+    if not await _container_running(container_name, ttl=_INSTALL_RUNNING_CACHE_TTL):
+        return _not_running_message(container_name)
+    
+    pm = _package_manager_cache.get(container_name)
+    if pm:
+        print_colored(f"Using {pm} for installation", "cyan")
+        install_argv = _install_argv(pm, deps)
+    else:
+        # Detect the package manager and install in a single exec
+        install_argv = _chained_install_argv(deps)
+    
+    # Execute the installation command
+    print_colored(f"Running: {shlex.join(install_argv)}", "cyan")
+    ok, output = await _run_install(container_name, install_argv, deps)
+    if not ok:
+        return output
+    
+    if pm is None:
+        pm = _used_package_manager(output)
+        if pm:
+            print_colored(f"Used {pm} for installation", "cyan")
+            # apt-get/apk installs can add new package managers (e.g. pip), so detect again next time
+            if pm in ("npm", "pip"):
+                _package_manager_cache[container_name] = pm
+    
+    print_colored("Dependencies installed successfully", "green")
+    return f"Dependencies installed in container '{container_name}': {dependencies}"
 
 @mcp.tool()
-def list_containers(show_all: bool = True) -> str:
+async def list_containers(show_all: bool = True) -> str:
     """
     List all Docker containers with their details.
     
@@ -491,49 +1141,50 @@ def list_containers(show_all: bool = True) -> str:
     """
     print_colored(f"Listing {'all' if show_all else 'running'} containers...")
     
-    try:
-        cmd = ["docker", "ps"]
+    result = await _docker_api(
+        "GET", "/containers/json", params={"all": "true" if show_all else "false"},
+        timeout=15, label="listing containers"
+    )
+    if result is not None:
+        ok, containers = result
+        if not ok:
+            return containers
+        rows = [_api_container_row(container) for container in containers]
+    else:
+        # One JSON object per container is easier to parse reliably than docker's table output
+        cmd = [_DOCKER, "ps", "--format", "{{json .}}"]
         if show_all:
             cmd.append("-a")  # Show all containers, not just running ones
-            
-        # Add format to get consistent, parseable output with specific fields
-        cmd.extend([
-            "--format", 
-            "table {{.ID}}\t{{.Names}}\t{{.Status}}\t{{.Image}}\t{{.RunningFor}}"
-        ])
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True, text=True, check=True, timeout=15
-        )
-        
-        container_list = result.stdout.strip()
-        
-        if container_list and not container_list.startswith("CONTAINER ID"):
-            # This means we have a table header but no data
-            print_colored("No containers found", "yellow")
-            return f"No {'existing' if show_all else 'running'} containers found."
         
-        print_colored(f"Found containers:\n{container_list}", "cyan")
+        ok, output = await _run_docker(cmd, timeout=15, label="listing containers")
+        if not ok:
+            return output
         
-        # Add extra information about how to use this data
-        usage_info = "\nYou can use these container names with other tools like add_dependencies, execute_code, etc."
-        if show_all:
-            usage_info += "\nNote: Only containers with 'Up' in their Status are currently running and can be interacted with."
-        
-        return f"{container_list}{usage_info}"
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Error listing containers: {e.stderr}"
-        print_colored(error_msg, "red")
-        return error_msg
-    except subprocess.TimeoutExpired:
-        error_msg = "Timeout while listing containers. Operation took too long."
-        print_colored(error_msg, "red")
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print_colored(error_msg, "red")
-        return error_msg 
+        try:
+            rows = [json.loads(line) for line in output.splitlines() if line.strip()]
+        except ValueError as e:
+            return f"Unexpected error: could not parse docker ps output: {str(e)}"
+    
+    if not rows:
+        print_colored("No containers found", "yellow")
+        return f"No {'existing' if show_all else 'running'} containers found."
+    
+    # Remember which containers are running so the next tool calls can skip their own probe
+    now = time.monotonic()
+    for row in rows:
+        running = row.get("State", "").lower() == "running" or row.get("Status", "").startswith("Up")
+        for name in row.get("Names", "").split(","):
+            _running_cache[name] = (now, running)
+    
+    container_list = _format_container_table(rows)
+    print_colored(f"Found containers:\n{container_list}", "cyan")
+    
+    # Add extra information about how to use this data
+    usage_info = "\nYou can use these container names with other tools like add_dependencies, execute_code, etc."
+    if show_all:
+        usage_info += "\nNote: Only containers with 'Up' in their Status are currently running and can be interacted with."
+    
+    return f"{container_list}{usage_info}"
 
 # Main entry point for MCP server
 if __name__ == "__main__":
@@ -542,7 +1193,5 @@ if __name__ == "__main__":
         # This starts the MCP server
         mcp.run()
     except Exception as e:
-        error_message = f"Error starting MCP server: {str(e)}"
-        logging.error(error_message)
-        print(error_message, file=sys.stderr)
+        print_colored(f"Error starting MCP server: {str(e)}", "red")
         sys.exit(1) 
\ No newline at end of file
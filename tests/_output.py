@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Colored, buffered log output shared by the test scripts.
+
+Lines passed to log() are collected in memory and written to stdout with one write when
+flush_log() is called; each script flushes at the end of its own phases (a test, a setup
+step, ...). Anything still buffered when the process exits is flushed then.
+"""
+
+import atexit
+import io
+import sys
+from termcolor import colored as _termcolor_colored
+
+# Escape codes are only worth writing to a terminal; in CI logs they are just noise
+_USE_COLOR = sys.stdout.isatty()
+
+_log_buf = io.StringIO()
+
+def colored(text, color):
+    """Color text for the terminal, or return it unchanged when stdout isn't a TTY."""
+    return _termcolor_colored(text, color) if _USE_COLOR else text
+
+def log(message, color):
+    """Buffer a colored log line until the next flush_log()."""
+    _log_buf.write(colored(message, color))
+    _log_buf.write("\n")
+
+def flush_log():
+    """Write out the buffered log lines in one go."""
+    if _log_buf.tell():
+        sys.stdout.write(_log_buf.getvalue())
+        sys.stdout.flush()
+        _log_buf.seek(0)
+        _log_buf.truncate()
+
+atexit.register(flush_log)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import sys
+import unittest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.docker_mcp import _split_command, execute_code
+
+class CommandParsingTests(unittest.TestCase):
+    """Tests for how execute_code turns a command string into argv."""
+
+    def test_python_dash_c_keeps_code_as_one_argument(self):
+        self.assertEqual(
+            _split_command('python -c print("a b")'),
+            ["python", "-c", 'print("a b")']
+        )
+
+    def test_python3_dash_c(self):
+        self.assertEqual(
+            _split_command("python3.11 -c import sys; print(sys.version)"),
+            ["python3.11", "-c", "import sys; print(sys.version)"]
+        )
+
+    def test_any_python_version_dash_c(self):
+        self.assertEqual(
+            _split_command("python2 -c print 'hi'"),
+            ["python2", "-c", "print 'hi'"]
+        )
+
+    def test_quoted_python_dash_c_payload_is_unquoted(self):
+        self.assertEqual(
+            _split_command("python -c 'import sys; print(\"x\")'"),
+            ["python", "-c", 'import sys; print("x")']
+        )
+
+    def test_python_option_starting_with_c_is_not_dash_c(self):
+        self.assertEqual(_split_command("python -config x"), ["python", "-config", "x"])
+
+    def test_plain_command_is_split_on_whitespace(self):
+        self.assertEqual(_split_command("ls  -la   /tmp"), ["ls", "-la", "/tmp"])
+
+    def test_quoted_command_uses_shell_splitting(self):
+        self.assertEqual(_split_command("echo 'hello world'"), ["echo", "hello world"])
+
+    def test_unclosed_quote_raises(self):
+        with self.assertRaises(ValueError):
+            _split_command("echo 'oops")
+
+    def test_empty_command_is_rejected(self):
+        for command in ("", "   "):
+            self.assertEqual(_split_command(command), [])
+            # Rejected before the container is even looked up
+            self.assertEqual(
+                asyncio.run(execute_code("any-container", command)),
+                "Error executing command: no command given"
+            )
+
+if __name__ == "__main__":
+    unittest.main()
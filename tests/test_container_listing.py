@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import docker_mcp
+from src.docker_mcp import _api_container_row, _format_container_table, list_containers
+
+PS_ROWS = [
+    {"ID": "abc123", "Names": "web", "Status": "Up 2 minutes", "Image": "nginx:latest",
+     "RunningFor": "2 minutes ago", "State": "running"},
+    {"ID": "def456", "Names": "old-job", "Status": "Exited (0) 2 days ago", "Image": "python:3.12-slim",
+     "RunningFor": "3 days ago", "State": "exited"},
+]
+
+class ContainerTableTests(unittest.TestCase):
+    """Tests for turning docker ps / Engine API container data into the list_containers table."""
+
+    def test_table_columns_are_aligned(self):
+        self.assertEqual(
+            _format_container_table(PS_ROWS).splitlines(),
+            [
+                "CONTAINER ID   NAMES     STATUS                  IMAGE              CREATED",
+                "abc123         web       Up 2 minutes            nginx:latest       2 minutes ago",
+                "def456         old-job   Exited (0) 2 days ago   python:3.12-slim   3 days ago",
+            ]
+        )
+
+    def test_api_container_row(self):
+        row = _api_container_row({
+            "Id": "0123456789abcdef" * 4,
+            "Names": ["/web", "/web-alias"],
+            "Status": "Up 2 minutes",
+            "Image": "nginx:latest",
+            "Created": time.time() - 125,
+            "State": "running",
+        })
+        self.assertEqual(row, {
+            "ID": "0123456789ab",
+            "Names": "web,web-alias",
+            "Status": "Up 2 minutes",
+            "Image": "nginx:latest",
+            "RunningFor": "2 minutes ago",
+            "State": "running",
+        })
+
+class ListContainersTests(unittest.IsolatedAsyncioTestCase):
+    """Tests for list_containers on the docker CLI path (docker ps JSON output)."""
+
+    def setUp(self):
+        # No Engine API, so the listing comes from 'docker ps --format {{json .}}'
+        for name, value in (("_docker_api", None), ("_run_docker", (True, ""))):
+            patcher = mock.patch.object(docker_mcp, name, mock.AsyncMock(return_value=value))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(docker_mcp._running_cache.clear)
+
+    async def test_no_containers(self):
+        self.assertEqual(await list_containers(), "No existing containers found.")
+        self.assertEqual(await list_containers(show_all=False), "No running containers found.")
+
+    async def test_containers_are_listed(self):
+        docker_mcp._run_docker.return_value = (True, "".join(json.dumps(row) + "\n" for row in PS_ROWS))
+        output = await list_containers()
+        self.assertTrue(output.startswith(_format_container_table(PS_ROWS)), output)
+        self.assertTrue(docker_mcp._running_cache["web"][1])
+        self.assertFalse(docker_mcp._running_cache["old-job"][1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,111 +2,273 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+import select
+import shutil
 import subprocess
 import time
-import uuid
+import os
 import sys
-from termcolor import colored
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from tests._output import flush_log, log
+
+# The docker CLI's absolute path and close_fds=False let subprocess spawn it with posix_spawn
+# rather than fork+exec, which avoids copying the test process's page tables for each call.
+# Don't add preexec_fn, cwd, pass_fds or start_new_session to these calls: any of them forces
+# the fork+exec fallback.
+_DOCKER = shutil.which("docker") or "docker"
+_SPAWN_KWARGS = {"close_fds": False}
+
+def _docker_parallel(cmds):
+    """
+    Run independent docker commands concurrently and return their exit codes.
+    
+    Only use this for commands that don't depend on each other; their wall time is then
+    about that of the slowest one instead of the sum. Their output is discarded.
+    """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        return list(executor.map(
+            lambda cmd: subprocess.run(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                check=False, **_SPAWN_KWARGS
+            ).returncode,
+            cmds
+        ))
+
+def _docker_exec_chain(container_name, *commands):
+    """
+    Run shell commands in a container with a single 'docker exec', stopping at the first failure.
+    
+    Steps that check the same container should go through one call like this rather than
+    one 'docker exec' each. Returns their combined stdout and raises CalledProcessError if
+    any of them fails (stderr isn't captured, so it goes straight to the test output).
+    """
+    return subprocess.check_output(
+        [_DOCKER, "exec", container_name, "sh", "-c", " && ".join(commands)],
+        text=True, **_SPAWN_KWARGS
+    )
+
+def _new_container_name():
+    """Generate a unique container name for a test run."""
+    return f"test-container-{os.urandom(4).hex()}"
+
+class _PersistentShell:
+    """
+    A long-lived 'docker exec -i <container> sh' that runs commands sent over its stdin.
+    
+    Each command costs a write and a read on the open pipes instead of a new 'docker exec'.
+    """
+
+    def __init__(self, container_name):
+        self._process = subprocess.Popen(
+            [_DOCKER, "exec", "-i", container_name, "sh"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            **_SPAWN_KWARGS
+        )
+        self._sentinel = f"__END_{os.urandom(16).hex()}__"
+
+    def run(self, command):
+        """Run a command in the shell and return (exit_code, output), stderr included."""
+        # The command's stdin is /dev/null so it can't swallow the commands that follow it
+        self._process.stdin.write(f"{{ {command}\n}} </dev/null\necho \"{self._sentinel}$?\"\n")
+        self._process.stdin.flush()
+        output = []
+        for line in self._process.stdout:
+            # The sentinel can follow output that doesn't end with a newline
+            index = line.find(self._sentinel)
+            if index != -1:
+                output.append(line[:index])
+                return int(line[index + len(self._sentinel):]), "".join(output)
+            output.append(line)
+        raise RuntimeError("The container shell exited before the command finished")
+
+    def close(self):
+        """Close the shell and wait for it to exit."""
+        self._process.stdin.close()
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process.stdout.close()
 
 class DockerMCPTests(unittest.TestCase):
     """Tests for Docker MCP server functionality."""
 
-    def setUp(self):
-        """Set up test environment by defining test container name."""
-        # Generate a unique container name for this test run
-        self.container_name = f"test-container-{uuid.uuid4().hex[:8]}"
-        self.test_image = "alpine:latest"
-        print(colored(f"[TEST] Using container name: {self.container_name}", "cyan"))
-        
-        # Check if Docker is available
+    test_image = "alpine:latest"
+
+    @classmethod
+    def setUpClass(cls):
+        """Check for Docker and start the container shared by the tests in this class."""
         try:
             subprocess.run(
-                ["docker", "--version"], 
+                [_DOCKER, "--version"], 
                 check=True, 
                 capture_output=True, 
-                text=True
+                text=True, **_SPAWN_KWARGS
             )
         except (subprocess.SubprocessError, FileNotFoundError) as e:
-            self.fail(f"Docker is not available. Please make sure Docker is installed and running: {str(e)}")
+            raise unittest.SkipTest(f"Docker is not available. Please make sure Docker is installed and running: {str(e)}")
+        
+        # Pull the image once up front so the tests' 'docker run' calls never wait on the registry
+        pull_result = subprocess.run(
+            [_DOCKER, "pull", "-q", cls.test_image],
+            capture_output=True, text=True, check=False, **_SPAWN_KWARGS
+        )
+        if pull_result.returncode != 0:
+            # Offline is fine as long as the image is already present locally
+            inspect_result = subprocess.run(
+                [_DOCKER, "image", "inspect", cls.test_image],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False, **_SPAWN_KWARGS
+            )
+            if inspect_result.returncode != 0:
+                raise unittest.SkipTest(f"Could not pull {cls.test_image}: {pull_result.stderr.strip()}")
+        
+        # Tests that only need to run commands share one container instead of creating their own
+        cls.container_name = _new_container_name()
+        log(f"[TEST] Using shared container: {cls.container_name}", "cyan")
+        subprocess.run(
+            [_DOCKER, "run", "-d", "--name", cls.container_name, cls.test_image, "sleep", "infinity"],
+            capture_output=True, text=True, check=True, **_SPAWN_KWARGS
+        )
+        # Class cleanups also run if the rest of setUpClass fails, unlike tearDownClass,
+        # so nothing started from here on can be leaked. They run in reverse order.
+        cls.addClassCleanup(cls._remove_shared_container)
+        if not cls._wait_running(cls.container_name):
+            raise RuntimeError(f"Shared container {cls.container_name} did not start running")
+        cls.shell = _PersistentShell(cls.container_name)
+        cls.addClassCleanup(cls.shell.close)
+        
+        # The lifecycle test's container gets its name now so its removal can be watched for
+        # as a daemon event instead of being confirmed with another 'docker ps' afterwards.
+        # --since replays the event even if the subscription is only set up after it happened.
+        cls.lifecycle_container_name = _new_container_name()
+        cls.destroy_events = subprocess.Popen(
+            [_DOCKER, "events", "--since", str(int(time.time())),
+             "--filter", f"container={cls.lifecycle_container_name}",
+             "--filter", "event=destroy", "--format", "{{.Status}}"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, **_SPAWN_KWARGS
+        )
+        cls.addClassCleanup(cls._stop_destroy_events)
+        flush_log()
+
+    @classmethod
+    def _stop_destroy_events(cls):
+        """Stop the 'docker events' watcher."""
+        cls.destroy_events.kill()
+        cls.destroy_events.wait()
+        cls.destroy_events.stdout.close()
+
+    @classmethod
+    def _remove_shared_container(cls):
+        """Remove the shared container."""
+        subprocess.run(
+            [_DOCKER, "rm", "-f", cls.container_name],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False, **_SPAWN_KWARGS
+        )
+        log(f"[TEST] Cleanup complete for shared container: {cls.container_name}", "green")
+        flush_log()
+
+    def setUp(self):
+        """Set up test environment."""
+        # Names of containers a test creates for itself (removed in tearDown)
+        self.own_containers = []
+        # Runs after tearDown, so the test's cleanup lines are flushed with the rest of its log
+        self.addCleanup(flush_log)
 
     def tearDown(self):
         """Clean up any containers that might be left over."""
+        if not self.own_containers:
+            return
         try:
-            # Try to stop and remove the container used in tests
-            subprocess.run(
-                ["docker", "stop", self.container_name],
-                capture_output=True, check=False
-            )
-            subprocess.run(
-                ["docker", "rm", self.container_name],
-                capture_output=True, check=False
-            )
-            print(colored(f"[TEST] Cleanup complete for container: {self.container_name}", "green"))
+            # Stop and remove each container in a single call, all of them at once
+            _docker_parallel([[_DOCKER, "rm", "-f", name] for name in self.own_containers])
+            log(f"[TEST] Cleanup complete for containers: {', '.join(self.own_containers)}", "green")
         except Exception as e:
-            print(colored(f"[TEST] Cleanup error (this is usually fine): {str(e)}", "yellow"))
+            log(f"[TEST] Cleanup error (this is usually fine): {str(e)}", "yellow")
+
+    @staticmethod
+    def _wait_running(name, timeout=5.0):
+        """Poll until the container is running; return False if it isn't within the timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = subprocess.run(
+                [_DOCKER, "inspect", "-f", "{{.State.Running}}", name],
+                capture_output=True, text=True, **_SPAWN_KWARGS
+            )
+            if result.stdout.strip() == "true":
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_execute_command(self):
+        """Test executing a command in a running container."""
+        log("\n[TEST] Testing command execution...", "cyan")
+        exit_code, output = self.shell.run("echo Hello from Docker!")
+        log(f"[TEST] Command output: {output.strip()}", "green")
+        
+        # Verify the command execution was successful
+        self.assertEqual(exit_code, 0, f"Failed to execute command in container: {output}")
+        self.assertEqual(output.strip(), "Hello from Docker!")
 
     def test_container_lifecycle(self):
         """Test full container lifecycle: create, execute, cleanup."""
-        print(colored("\n[TEST] Testing container lifecycle...", "cyan"))
+        log("\n[TEST] Testing container lifecycle...", "cyan")
+        # This test creates and removes its own container rather than using the shared one
+        self.own_container_name = self.lifecycle_container_name
+        self.own_containers.append(self.own_container_name)
+        log(f"[TEST] Using container name: {self.own_container_name}", "cyan")
         
         # 1. Create container
-        print(colored("[TEST] Creating container...", "blue"))
+        log("[TEST] Creating container...", "blue")
         try:
             create_result = subprocess.run(
-                ["docker", "run", "-d", "--name", self.container_name, self.test_image, "sleep", "infinity"],
-                capture_output=True, text=True, check=True
+                [_DOCKER, "run", "-d", "--name", self.own_container_name, self.test_image, "sleep", "infinity"],
+                capture_output=True, text=True, check=True, **_SPAWN_KWARGS
             )
             container_id = create_result.stdout.strip()
-            print(colored(f"[TEST] Container created. ID: {container_id}", "green"))
+            log(f"[TEST] Container created. ID: {container_id}", "green")
         except subprocess.CalledProcessError as e:
             self.fail(f"Failed to create container: {e.stderr}")
         
-        # Wait briefly to ensure container is running
-        time.sleep(1)
+        # Wait until the container is running (usually well under a second)
+        self.assertTrue(
+            self._wait_running(self.own_container_name),
+            f"Container {self.own_container_name} did not start running"
+        )
         
         # 2. Execute command in container
-        print(colored("[TEST] Executing command in container...", "blue"))
+        log("[TEST] Executing command in container...", "blue")
         try:
-            exec_result = subprocess.run(
-                ["docker", "exec", self.container_name, "echo", "Hello from Docker!"],
-                capture_output=True, text=True, check=True
-            )
-            output = exec_result.stdout.strip()
-            print(colored(f"[TEST] Command output: {output}", "green"))
-            
-            # Verify the command execution was successful
-            self.assertEqual(output, "Hello from Docker!")
+            exec_output = _docker_exec_chain(self.own_container_name, "echo 'Hello from Docker!'")
+            self.assertEqual(exec_output.strip(), "Hello from Docker!")
         except subprocess.CalledProcessError as e:
-            self.fail(f"Failed to execute command in container: {e.stderr}")
+            self.fail(f"Failed to execute command in container: {str(e)}")
         
         # 3. Cleanup container
-        print(colored("[TEST] Cleaning up container...", "blue"))
+        log("[TEST] Cleaning up container...", "blue")
         
         try:
-            # Stop the container
-            stop_result = subprocess.run(
-                ["docker", "stop", self.container_name],
-                capture_output=True, text=True, check=True
-            )
-            
-            # Remove the container
-            rm_result = subprocess.run(
-                ["docker", "rm", self.container_name],
-                capture_output=True, text=True, check=True
+            # Stop and remove the container
+            subprocess.run(
+                [_DOCKER, "rm", "-f", self.own_container_name],
+                capture_output=True, text=True, check=True, **_SPAWN_KWARGS
             )
             
-            print(colored(f"[TEST] Container {self.container_name} stopped and removed", "green"))
+            log(f"[TEST] Container {self.own_container_name} stopped and removed", "green")
             
-            # Verify container no longer exists
-            check_result = subprocess.run(
-                ["docker", "ps", "-a", "--filter", f"name={self.container_name}", "--format", "{{.Names}}"],
-                capture_output=True, text=True, check=True
-            )
-            self.assertEqual(check_result.stdout.strip(), "")
-            print(colored("[TEST] Verified container no longer exists", "green"))
+            # Verify container no longer exists: the daemon reports its destroy event
+            events = self.destroy_events.stdout
+            ready, _, _ = select.select([events], [], [], 2.0)
+            self.assertTrue(ready, f"No destroy event for {self.own_container_name} within 2 seconds")
+            self.assertEqual(events.readline().strip(), "destroy")
+            log("[TEST] Verified container no longer exists", "green")
         except subprocess.CalledProcessError as e:
             self.fail(f"Failed to cleanup container: {e.stderr}")
 
 if __name__ == "__main__":
-    print(colored("[TEST] Starting Docker MCP tests...", "cyan"))
-    unittest.main() 
\ No newline at end of file
+    log("[TEST] Starting Docker MCP tests...", "cyan")
+    unittest.main()
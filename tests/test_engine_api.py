@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import docker_mcp
+from src.docker_mcp import (
+    _container_running, _docker_api, _docker_socket_path, _image_present, cleanup_container,
+    create_container, list_containers
+)
+
+class DockerEndpointTests(unittest.TestCase):
+    """Tests for finding the daemon socket the docker CLI uses, so the API talks to the same daemon."""
+
+    def setUp(self):
+        config_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(config_dir.cleanup)
+        self.config_dir = config_dir.name
+
+    def write_json(self, data, *path):
+        path = os.path.join(self.config_dir, *path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def add_context(self, name, host):
+        self.write_json(
+            {"Name": name, "Endpoints": {"docker": {"Host": host, "SkipTLSVerify": False}}},
+            "contexts", "meta", hashlib.sha256(name.encode()).hexdigest(), "meta.json"
+        )
+
+    def socket_path(self, **env):
+        environ = {
+            key: value for key, value in os.environ.items()
+            if key not in ("DOCKER_HOST", "DOCKER_CONTEXT")
+        }
+        environ["DOCKER_CONFIG"] = self.config_dir
+        environ.update(env)
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return _docker_socket_path()
+
+    def test_default_socket(self):
+        self.assertEqual(self.socket_path(), "/var/run/docker.sock")
+        self.write_json({"currentContext": "default"}, "config.json")
+        self.assertEqual(self.socket_path(), "/var/run/docker.sock")
+
+    def test_docker_host(self):
+        self.assertEqual(self.socket_path(DOCKER_HOST="unix:///run/user/1000/docker.sock"), "/run/user/1000/docker.sock")
+        self.assertIsNone(self.socket_path(DOCKER_HOST="tcp://10.0.0.2:2376"))
+
+    def test_current_context_from_config(self):
+        self.add_context("desktop-linux", "unix:///home/me/.docker/desktop/docker.sock")
+        self.write_json({"currentContext": "desktop-linux"}, "config.json")
+        self.assertEqual(self.socket_path(), "/home/me/.docker/desktop/docker.sock")
+
+    def test_docker_context_overrides_config(self):
+        self.add_context("colima", "unix:///home/me/.colima/default/docker.sock")
+        self.add_context("remote", "ssh://me@build-host")
+        self.write_json({"currentContext": "colima"}, "config.json")
+        self.assertIsNone(self.socket_path(DOCKER_CONTEXT="remote"))
+        self.assertEqual(self.socket_path(DOCKER_CONTEXT="default"), "/var/run/docker.sock")
+
+    def test_docker_host_overrides_context(self):
+        self.add_context("colima", "unix:///home/me/.colima/default/docker.sock")
+        self.assertEqual(
+            self.socket_path(DOCKER_CONTEXT="colima", DOCKER_HOST="unix:///tmp/docker.sock"), "/tmp/docker.sock"
+        )
+
+    def test_unknown_context_uses_the_cli(self):
+        self.write_json({"currentContext": "missing"}, "config.json")
+        self.assertIsNone(self.socket_path())
+
+class EngineApiTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Base class that answers Engine API requests from self.routes instead of a daemon.
+    
+    routes maps (method, path) to an httpx.Response or an exception to raise. Requests are
+    recorded in self.requests, and docker CLI fallbacks in the self.run_docker mock.
+    """
+
+    def setUp(self):
+        self.routes = {}
+        self.requests = []
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.dispatch), base_url="http://docker")
+        self.run_docker = mock.AsyncMock(return_value=(True, ""))
+        for name, value in (("_api_client", lambda: self.client), ("_run_docker", self.run_docker)):
+            patcher = mock.patch.object(docker_mcp, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def dispatch(self, request):
+        self.requests.append((request.method, request.url.path, dict(request.url.params)))
+        answer = self.routes.get((request.method, request.url.path), httpx.Response(404, json={"message": "page not found"}))
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+class DockerApiTests(EngineApiTestCase):
+    """Tests for _docker_api's results, errors and fallbacks to the docker CLI."""
+
+    async def call(self, method="GET", path="/containers/web/json", **kwargs):
+        return await _docker_api(method, path, timeout=5, label="inspecting container", **kwargs)
+
+    async def test_json_response(self):
+        self.routes[("GET", "/containers/web/json")] = httpx.Response(200, json={"Id": "abc"})
+        self.assertEqual(await self.call(), (True, {"Id": "abc"}))
+
+    async def test_empty_response(self):
+        self.routes[("POST", "/containers/web/start")] = httpx.Response(204)
+        self.assertEqual(await self.call("POST", "/containers/web/start"), (True, None))
+
+    async def test_error_message_from_json_body(self):
+        self.routes[("GET", "/containers/web/json")] = httpx.Response(500, json={"message": "daemon is busy\n"})
+        self.assertEqual(await self.call(), (False, "Error inspecting container: daemon is busy"))
+
+    async def test_error_message_from_text_body(self):
+        self.routes[("GET", "/containers/web/json")] = httpx.Response(500, text="Internal Server Error")
+        self.assertEqual(await self.call(), (False, "Error inspecting container: Internal Server Error"))
+
+    async def test_fallback_status(self):
+        self.assertIsNone(await self.call(fallback_statuses=(404,)))
+        self.assertEqual(await self.call(), (False, "Error inspecting container: page not found"))
+
+    async def test_unreachable_daemon_falls_back(self):
+        self.routes[("GET", "/containers/web/json")] = httpx.ConnectError("Permission denied")
+        self.assertIsNone(await self.call())
+
+    async def test_timeout_is_an_error(self):
+        self.routes[("GET", "/containers/web/json")] = httpx.ReadTimeout("timed out")
+        self.assertEqual(
+            await self.call(), (False, "Timeout while inspecting container. Operation took too long.")
+        )
+
+    async def test_no_api_client(self):
+        with mock.patch.object(docker_mcp, "_api_client", lambda: None):
+            self.assertIsNone(await self.call())
+        self.assertEqual(self.requests, [])
+
+class CreateContainerApiTests(EngineApiTestCase):
+    """Tests for create_container through the Engine API."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(docker_mcp._running_cache.clear)
+
+    async def test_create_and_start(self):
+        self.routes[("POST", "/containers/create")] = httpx.Response(201, json={"Id": "abc123", "Warnings": []})
+        self.routes[("POST", "/containers/abc123/start")] = httpx.Response(204)
+        self.assertEqual(await create_container("alpine:latest", "web"), "Container created with ID: abc123")
+        self.assertEqual(
+            [(method, path) for method, path, _ in self.requests],
+            [("POST", "/containers/create"), ("POST", "/containers/abc123/start")]
+        )
+        self.assertEqual(self.requests[0][2], {"name": "web"})
+        self.assertTrue(docker_mcp._running_cache["web"][1])
+        self.run_docker.assert_not_awaited()
+
+    async def test_missing_image_falls_back_to_docker_run(self):
+        # The API can't pull as part of create, so a missing image (404) goes through 'docker run'
+        self.routes[("POST", "/containers/create")] = httpx.Response(404, json={"message": "No such image: alpine:latest"})
+        self.run_docker.return_value = (True, "def456\n")
+        self.assertEqual(await create_container("alpine:latest", "web"), "Container created with ID: def456")
+        self.assertEqual(self.run_docker.await_args.args[0][-4:], ("web", "alpine:latest", "sleep", "infinity"))
+
+    async def test_start_failure(self):
+        self.routes[("POST", "/containers/create")] = httpx.Response(201, json={"Id": "abc123"})
+        self.routes[("POST", "/containers/abc123/start")] = httpx.Response(
+            500, json={"message": "driver failed programming external connectivity"}
+        )
+        self.assertEqual(
+            await create_container("alpine:latest", "web"),
+            "Error creating container: driver failed programming external connectivity"
+        )
+        self.assertNotIn("web", docker_mcp._running_cache)
+
+    async def test_name_conflict(self):
+        self.routes[("POST", "/containers/create")] = httpx.Response(
+            409, json={"message": 'Conflict. The container name "/web" is already in use'}
+        )
+        self.assertEqual(
+            await create_container("alpine:latest", "web"),
+            'Error creating container: Conflict. The container name "/web" is already in use'
+        )
+
+class ContainerStateApiTests(EngineApiTestCase):
+    """Tests for the GET endpoints: container listing, running state and local images."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(docker_mcp._running_cache.clear)
+
+    async def test_list_containers(self):
+        self.routes[("GET", "/containers/json")] = httpx.Response(200, json=[{
+            "Id": "abc123" * 4, "Names": ["/web"], "Status": "Up 5 seconds", "Image": "alpine:latest",
+            "Created": 0, "State": "running",
+        }])
+        output = await list_containers(show_all=False)
+        self.assertEqual(self.requests, [("GET", "/containers/json", {"all": "false"})])
+        self.assertIn("abc123abc123   web     Up 5 seconds   alpine:latest", output)
+        self.assertTrue(docker_mcp._running_cache["web"][1])
+
+    async def test_list_no_containers(self):
+        self.routes[("GET", "/containers/json")] = httpx.Response(200, json=[])
+        self.assertEqual(await list_containers(), "No existing containers found.")
+
+    async def test_container_running(self):
+        self.routes[("GET", "/containers/web/json")] = httpx.Response(200, json={"State": {"Running": True}})
+        self.routes[("GET", "/containers/stopped/json")] = httpx.Response(200, json={"State": {"Running": False}})
+        self.assertTrue(await _container_running("web"))
+        self.assertFalse(await _container_running("stopped"))
+        self.assertFalse(await _container_running("missing"))  # 404
+        # Answers are cached for a short while
+        self.assertTrue(await _container_running("web"))
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_image_present(self):
+        self.routes[("GET", "/images/library/alpine:latest/json")] = httpx.Response(200, json={"Id": "sha256:abc"})
+        self.assertTrue(await _image_present("library/alpine:latest"))
+        self.assertFalse(await _image_present("alpine:missing"))
+
+class CleanupContainerApiTests(EngineApiTestCase):
+    """Tests for cleanup_container through the Engine API."""
+
+    async def test_container_removed(self):
+        self.routes[("DELETE", "/containers/web")] = httpx.Response(204)
+        self.assertEqual(await cleanup_container("web"), "Container 'web' has been stopped and removed.")
+        self.assertEqual(self.requests, [("DELETE", "/containers/web", {"force": "true"})])
+        self.run_docker.assert_not_awaited()
+
+    async def test_missing_container_counts_as_removed(self):
+        # The same result as 'docker rm -f' gives on the CLI path
+        self.routes[("DELETE", "/containers/gone")] = httpx.Response(404, json={"message": "No such container: gone"})
+        self.assertEqual(await cleanup_container("gone"), "Container 'gone' has been stopped and removed.")
+        self.run_docker.assert_not_awaited()
+
+    async def test_daemon_error(self):
+        self.routes[("DELETE", "/containers/web")] = httpx.Response(
+            409, json={"message": "removal of container web is already in progress"}
+        )
+        self.assertEqual(
+            await cleanup_container("web"),
+            "Error cleaning up container: removal of container web is already in progress"
+        )
+
+if __name__ == "__main__":
+    unittest.main()
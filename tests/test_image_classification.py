@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import unittest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.docker_mcp import _classify_image
+
+class ImageClassificationTests(unittest.TestCase):
+    """Tests for how create_container picks a package manager from the image name."""
+
+    def test_known_images(self):
+        self.assertEqual(_classify_image("node:16"), "node")
+        self.assertEqual(_classify_image("python:3.9-slim"), "python")
+        self.assertEqual(_classify_image("ubuntu:latest"), "debian")
+        self.assertEqual(_classify_image("debian:bookworm"), "debian")
+        self.assertEqual(_classify_image("alpine:3.19"), "alpine")
+
+    def test_match_is_case_insensitive(self):
+        self.assertEqual(_classify_image("Library/Python:3.12"), "python")
+
+    def test_language_takes_precedence_over_distro(self):
+        self.assertEqual(_classify_image("python:3.12-alpine"), "python")
+        self.assertEqual(_classify_image("alpine/python"), "python")
+        self.assertEqual(_classify_image("node:20-bookworm-debian"), "node")
+
+    def test_unknown_image(self):
+        self.assertEqual(_classify_image("busybox"), "unknown")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import unittest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.docker_mcp import _invalid_input
+
+class InputValidationTests(unittest.TestCase):
+    """Tests for the argument checks the tools run before calling docker."""
+
+    def test_valid_arguments(self):
+        self.assertIsNone(_invalid_input("python-test_1.0", "python:3.9-slim", ["numpy>=1.26", "pandas"]))
+
+    def test_invalid_container_names(self):
+        for name in ("", "-leading-dash", "has space", "semi;colon", "a" * 129):
+            self.assertIsNotNone(_invalid_input(name), name)
+
+    def test_invalid_images(self):
+        for image in ("", " python", "python 3"):
+            self.assertIsNotNone(_invalid_input(image=image), image)
+
+    def test_dependencies_with_shell_operators(self):
+        error = _invalid_input(deps=["numpy", "x;rm", "$(id)"])
+        self.assertIn("x;rm", error)
+        self.assertIn("$(id)", error)
+        self.assertNotIn("numpy", error)
+
+if __name__ == "__main__":
+    unittest.main()
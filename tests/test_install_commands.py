@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.docker_mcp import _chained_install_argv, _install_argv, _used_package_manager
+
+class InstallCommandTests(unittest.TestCase):
+    """Tests for the install commands run by create_container and add_dependencies."""
+
+    def run_chained_install(self, deps, package_managers):
+        """Run the chained install script locally with only the given (fake) package managers on PATH."""
+        with tempfile.TemporaryDirectory() as bin_dir:
+            for pm in package_managers:
+                path = os.path.join(bin_dir, pm)
+                with open(path, "w") as f:
+                    f.write(f'#!/bin/sh\nfor arg; do echo "{pm}: $arg"; done\n')
+                os.chmod(path, 0o755)
+            argv = _chained_install_argv(deps)
+            return subprocess.run(
+                [shutil.which("sh"), *argv[1:]],
+                capture_output=True, text=True, env={"PATH": bin_dir}
+            )
+
+    def test_package_names_are_separate_arguments(self):
+        self.assertEqual(_install_argv("pip", ["numpy", "a b"]), ("pip", "install", "--", "numpy", "a b"))
+
+    def test_chained_install_uses_first_package_manager_found(self):
+        result = self.run_chained_install(["left-pad", "a b"], ["pip", "apk"])
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(_used_package_manager(result.stdout), "pip")
+        self.assertEqual(
+            result.stdout.splitlines()[1:],
+            ["pip: install", "pip: --", "pip: left-pad", "pip: a b"]
+        )
+
+    def test_chained_install_prefers_npm(self):
+        result = self.run_chained_install(["express"], ["apk", "pip", "npm"])
+        self.assertEqual(_used_package_manager(result.stdout), "npm")
+
+    def test_chained_install_without_package_manager(self):
+        result = self.run_chained_install(["left-pad"], [])
+        self.assertEqual(result.returncode, 127)
+        self.assertIsNone(_used_package_manager(result.stdout))
+        self.assertIn("No supported package managers", result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
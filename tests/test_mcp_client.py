@@ -6,86 +6,153 @@ Test script for Docker MCP server using a simple MCP client
 import os
 import sys
 import json
+import select
 import subprocess
 import time
-import requests
-from termcolor import colored
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from tests._output import flush_log, log
+
+try:
+    import orjson  # Optional: faster JSON decoding/encoding for the response bodies
+except ImportError:
+    orjson = None
 
 def print_test(message):
     """Print test message in cyan"""
-    print(colored(f"[TEST] {message}", "cyan"))
+    log(f"[TEST] {message}", "cyan")
 
 def print_result(message):
     """Print result message in magenta"""
-    print(colored(f"[RESULT] {message}", "magenta"))
+    log(f"[RESULT] {message}", "magenta")
+
+def print_error(message):
+    """Print error message in red"""
+    log(f"[ERROR] {message}", "red")
+
+def wait_for_exit(process, timeout):
+    """Wait for a process to exit, using a pidfd to be woken up as soon as it does (Linux)."""
+    deadline = time.monotonic() + timeout
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:
+            pidfd = None  # e.g. the process was already reaped or the kernel is too old
+        if pidfd is not None:
+            try:
+                poller = select.poll()
+                poller.register(pidfd, select.POLLIN)
+                poller.poll(timeout * 1000)
+            finally:
+                os.close(pidfd)
+    return process.wait(timeout=max(0, deadline - time.monotonic()))
+
+def format_json_response(response):
+    """Decode a JSON response body and pretty-print it, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(response.json(), indent=2)
 
 def main():
     """Test MCP server using the MCP inspector/client"""
+    # The server API is on the default port. Use the loopback IP rather than "localhost" to skip
+    # name resolution; MCP_BASE_URL points the test at a server elsewhere (e.g. a private IP)
+    base_url = os.environ.get("MCP_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+    # One keep-alive client for every request, so they all reuse the same pooled connection
+    client = httpx.Client(base_url=base_url, timeout=5.0)
     try:
         # Start the MCP server in the background
         print_test("Starting the MCP server in the background...")
         server_process = subprocess.Popen(
             ["fastmcp", "dev", "src/main.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            # Nothing reads the server's output; a pipe would fill up and block a chatty server
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
         
-        # Wait for the server to start
+        # Wait for the server to start, polling until it answers instead of sleeping a fixed time
         print_test("Waiting for the server to start...")
-        time.sleep(5)
-        
-        # Now we can access the server API on the default port
-        base_url = "http://localhost:8000"
+        flush_log()
+        deadline = time.monotonic() + 10
+        while True:
+            if server_process.poll() is not None:
+                raise RuntimeError(f"MCP server exited during startup with code {server_process.returncode}")
+            try:
+                if client.get("/info", timeout=0.25).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() >= deadline:
+                raise RuntimeError("MCP server did not become ready within 10 seconds")
+            time.sleep(0.1)
         
         # Get server info
         print_test("Getting server info...")
-        response = requests.get(f"{base_url}/info")
-        if response.status_code == 200:
-            print_result(f"Server info: {json.dumps(response.json(), indent=2)}")
-        else:
-            print(colored(f"[ERROR] Failed to get server info: {response.status_code}", "red"))
-        
-        # Test execute_code tool
-        print_test("Testing execute_code tool...")
-        code_payload = {
-            "name": "execute_code",
-            "arguments": {
-                "language": "python",
-                "code": "print('Hello from MCP client!')\nprint(2 + 2)"
-            }
-        }
-        response = requests.post(f"{base_url}/tools/execute", json=code_payload)
+        response = client.get("/info")
         if response.status_code == 200:
-            print_result(f"Code execution result: {json.dumps(response.json(), indent=2)}")
+            print_result(f"Server info: {format_json_response(response)}")
         else:
-            print(colored(f"[ERROR] Failed to execute code: {response.status_code}", "red"))
+            print_error(f"Failed to get server info: {response.status_code}")
+        flush_log()
         
-        # Test list_supported_languages tool
-        print_test("Testing list_supported_languages tool...")
-        langs_payload = {
-            "name": "list_supported_languages",
-            "arguments": {}
-        }
-        response = requests.post(f"{base_url}/tools/execute", json=langs_payload)
-        if response.status_code == 200:
-            print_result(f"Supported languages: {json.dumps(response.json(), indent=2)}")
-        else:
-            print(colored(f"[ERROR] Failed to list languages: {response.status_code}", "red"))
+        # Test the execute_code and list_supported_languages tools. The server has no
+        # multi-tool endpoint, so both requests are sent concurrently to overlap their latency.
+        print_test("Testing execute_code and list_supported_languages tools...")
+        tool_calls = [
+            # (payload, result label, error label)
+            (
+                {
+                    "name": "execute_code",
+                    "arguments": {
+                        "language": "python",
+                        "code": "print('Hello from MCP client!')\nprint(2 + 2)"
+                    }
+                },
+                "Code execution result",
+                "Failed to execute code"
+            ),
+            (
+                {
+                    "name": "list_supported_languages",
+                    "arguments": {}
+                },
+                "Supported languages",
+                "Failed to list languages"
+            ),
+        ]
+        with ThreadPoolExecutor(max_workers=len(tool_calls)) as executor:
+            responses = list(executor.map(
+                lambda call: client.post("/tools/execute", json=call[0]),
+                tool_calls
+            ))
+        for (_, result_label, error_label), response in zip(tool_calls, responses):
+            if response.status_code == 200:
+                print_result(f"{result_label}: {format_json_response(response)}")
+            else:
+                print_error(f"{error_label}: {response.status_code}")
+        flush_log()
         
         # Clean up - stop the server
         print_test("Stopping the MCP server...")
         server_process.terminate()
-        stdout, stderr = server_process.communicate(timeout=5)
+        wait_for_exit(server_process, timeout=5)
         
         print_test("All tests completed!")
         
     except Exception as e:
-        print(colored(f"[ERROR] Test failed: {str(e)}", "red"))
+        print_error(f"Test failed: {str(e)}")
         try:
             server_process.terminate()
         except:
             pass
         sys.exit(1)
+    finally:
+        client.close()
+        flush_log()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
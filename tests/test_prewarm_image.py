@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import docker_mcp
+from src.docker_mcp import _DOCKER_PULL, prewarm_image
+
+class PrewarmImageTests(unittest.IsolatedAsyncioTestCase):
+    """Tests for prewarm_image, with the local image check and docker pull mocked out."""
+
+    def setUp(self):
+        self.image_present = mock.AsyncMock(return_value=False)
+        self.run_docker = mock.AsyncMock(return_value=(True, ""))
+        for name, value in (("_image_present", self.image_present), ("_run_docker", self.run_docker)):
+            patcher = mock.patch.object(docker_mcp, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_present_image_is_not_pulled(self):
+        self.image_present.return_value = True
+        self.assertEqual(await prewarm_image("alpine:latest"), "Image 'alpine:latest' is already available locally.")
+        self.run_docker.assert_not_awaited()
+
+    async def test_missing_image_is_pulled(self):
+        self.assertEqual(await prewarm_image("alpine:latest"), "Image 'alpine:latest' has been pulled.")
+        self.assertEqual(self.run_docker.await_args.args[0], (*_DOCKER_PULL, "alpine:latest"))
+
+    async def test_pull_failure(self):
+        self.run_docker.return_value = (False, "Error pulling image: pull access denied")
+        self.assertEqual(await prewarm_image("no-such/image"), "Error pulling image: pull access denied")
+
+    async def test_removed_image_is_pulled_again(self):
+        # e.g. 'docker rmi' between two calls: the second call must not trust the first one
+        self.image_present.return_value = True
+        await prewarm_image("alpine:latest")
+        self.image_present.return_value = False
+        self.assertEqual(await prewarm_image("alpine:latest"), "Image 'alpine:latest' has been pulled.")
+        self.run_docker.assert_awaited_once()
+
+    async def test_invalid_image(self):
+        self.assertEqual(await prewarm_image(" alpine"), "Invalid image name ' alpine'")
+        self.image_present.assert_not_awaited()
+
+if __name__ == "__main__":
+    unittest.main()
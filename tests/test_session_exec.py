@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import docker_mcp
+from src.docker_mcp import (
+    _chained_install_argv, _close_session, _read_until_sentinel, _run_install, _session_exec,
+    _sessions, _shell_less_containers, _used_package_manager
+)
+
+# Stands in for 'docker exec -i <container>': drops the container name and runs the rest locally
+FAKE_DOCKER_EXEC_STDIN = ("sh", "-c", 'shift; exec "$@"', "docker-exec")
+# The same for a container without sh, where docker exec fails to start it with exit code 127
+FAKE_SHELL_LESS_DOCKER_EXEC_STDIN = (
+    "sh", "-c",
+    'shift; if [ "$1" = sh ]; then echo \'exec: "sh": executable file not found\' >&2; exit 127; fi; exec "$@"',
+    "docker-exec"
+)
+
+SENTINEL = b"\n__MCP_DONE_test__"
+
+class ReadUntilSentinelTests(unittest.IsolatedAsyncioTestCase):
+    """Tests for reading a command's output and exit code from a session's stdout."""
+
+    async def read(self, pieces, output_limit=None, eof=False):
+        """Feed the pieces to a StreamReader one read at a time and return what was read."""
+        reader = asyncio.StreamReader()
+        task = asyncio.create_task(_read_until_sentinel(reader, SENTINEL, output_limit))
+        for piece in pieces:
+            reader.feed_data(piece)
+            await asyncio.sleep(0)  # Let the reader take this piece on its own
+        if eof:
+            reader.feed_eof()
+        buffer, returncode = await task
+        return bytes(buffer), returncode
+
+    async def test_output_and_exit_code(self):
+        self.assertEqual(await self.read([b"hello\n" + SENTINEL + b"3\n"]), (b"hello\n", 3))
+
+    async def test_sentinel_split_across_reads(self):
+        data = b"out" + SENTINEL + b"0\n"
+        pieces = [data[i:i + 4] for i in range(0, len(data), 4)]
+        self.assertEqual(await self.read(pieces), (b"out", 0))
+
+    async def test_exit_code_split_across_reads(self):
+        self.assertEqual(await self.read([b"x" + SENTINEL + b"12", b"7\n"]), (b"x", 127))
+
+    async def test_eof_before_sentinel(self):
+        self.assertEqual(await self.read([b"partial" + SENTINEL[:5]], eof=True), (b"partial" + SENTINEL[:5], None))
+
+    async def test_output_limit_keeps_head_and_tail(self):
+        output = bytes(range(256)) * 4
+        data = output + SENTINEL + b"0\n"
+        pieces = [data[i:i + 100] for i in range(0, len(data), 100)]
+        buffer, returncode = await self.read(pieces, output_limit=(64, 128))
+        self.assertEqual(returncode, 0)
+        omitted = len(output) - 64 - 128
+        self.assertEqual(
+            buffer,
+            output[:64] + f"\n... [{omitted} bytes of output omitted] ...\n".encode() + output[-128:]
+        )
+
+    async def test_output_within_limit_is_untouched(self):
+        self.assertEqual(await self.read([b"short" + SENTINEL + b"0\n"], output_limit=(4, 4)), (b"short", 0))
+
+class SessionExecTests(unittest.IsolatedAsyncioTestCase):
+    """Tests for running commands through a container's shell session, with a local sh as the container."""
+
+    container_name = "session-test"
+
+    def setUp(self):
+        patcher = mock.patch.object(docker_mcp, "_DOCKER_EXEC_STDIN", FAKE_DOCKER_EXEC_STDIN)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await _close_session(self.container_name)
+
+    async def run_command(self, *cmd_parts, stdin_text=None):
+        return await _session_exec(self.container_name, list(cmd_parts), 10, stdin_text=stdin_text)
+
+    async def test_output_and_exit_code(self):
+        self.assertEqual(await self.run_command("echo", "a  b"), "a  b\n")
+        with self.assertRaises(subprocess.CalledProcessError) as caught:
+            await self.run_command("sh", "-c", "echo oops >&2; exit 3")
+        self.assertEqual(caught.exception.returncode, 3)
+        self.assertEqual(caught.exception.output, b"oops\n")
+
+    async def test_stdin_text(self):
+        self.assertEqual(await self.run_command("cat", stdin_text="line 1\n'$HOME'"), "line 1\n'$HOME'\n")
+
+    async def test_cd_does_not_change_later_commands(self):
+        cwd = await self.run_command("pwd")
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(subprocess.CalledProcessError) as caught:
+                await self.run_command("cd", directory)
+            self.assertEqual(caught.exception.returncode, 127)
+            self.assertEqual(await self.run_command("pwd"), cwd)
+
+    async def test_export_does_not_leak_into_later_commands(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            await self.run_command("export", "MCP_TEST_VAR=x")
+        self.assertEqual(await self.run_command("sh", "-c", "echo ${MCP_TEST_VAR-unset}"), "unset\n")
+
+    async def test_exit_does_not_end_the_session(self):
+        await self.run_command("true")
+        process = _sessions[self.container_name].process
+        for cmd_parts in (("exit", "4"), ("exec", "true")):
+            with self.assertRaises(subprocess.CalledProcessError) as caught:
+                await self.run_command(*cmd_parts)
+            self.assertEqual(caught.exception.returncode, 127)
+        self.assertEqual(await self.run_command("echo", "still here"), "still here\n")
+        self.assertIs(_sessions[self.container_name].process, process)
+
+    async def test_busy_session_does_not_delay_other_calls(self):
+        await self.run_command("true")
+        slow = asyncio.create_task(self.run_command("sleep", "2"))
+        await asyncio.sleep(0.2)  # Let it take the session
+        start = time.monotonic()
+        self.assertEqual(await _session_exec(self.container_name, ["echo", "hi"], 1), "hi\n")
+        with self.assertRaises(asyncio.TimeoutError):
+            await _session_exec(self.container_name, ["sleep", "5"], 1)
+        self.assertLess(time.monotonic() - start, 1.8)
+        self.assertEqual(await slow, "")
+
+class ShellLessSessionTests(unittest.IsolatedAsyncioTestCase):
+    """Tests for containers without sh, whose commands fall back to one docker exec each."""
+
+    container_name = "shell-less-test"
+
+    def setUp(self):
+        patcher = mock.patch.object(docker_mcp, "_DOCKER_EXEC_STDIN", FAKE_SHELL_LESS_DOCKER_EXEC_STDIN)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(_shell_less_containers.discard, self.container_name)
+        # The install path checks for the docker CLI first, which isn't needed with the fake
+        env_patcher = mock.patch.dict(os.environ, {"DOCKER_MCP_SKIP_PROBE": "1"})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    async def test_commands_fall_back_to_docker_exec(self):
+        self.assertEqual(await _session_exec(self.container_name, ["echo", "hi"], 10), "hi\n")
+        self.assertIn(self.container_name, _shell_less_containers)
+        self.assertNotIn(self.container_name, _sessions)
+        self.assertEqual(await _session_exec(self.container_name, ["cat"], 10, stdin_text="x\n"), "x\n")
+        with self.assertRaises(subprocess.CalledProcessError) as caught:
+            await _session_exec(self.container_name, ["false"], 10)
+        self.assertEqual(caught.exception.returncode, 1)
+
+    async def test_install_script_falls_back_to_package_manager_probes(self):
+        # "echo" stands in for a package manager: 'echo --version' succeeds, the others don't exist
+        with mock.patch.object(docker_mcp, "_PACKAGE_MANAGERS", ("mcp-missing-pm", "echo")), \
+                mock.patch.dict(docker_mcp._INSTALL_ARGV, {
+                    "mcp-missing-pm": ("mcp-missing-pm", "install", "--"),
+                    "echo": ("echo", "installed", "--"),
+                }):
+            ok, output = await _run_install(
+                self.container_name, _chained_install_argv(["left-pad"]), ["left-pad"]
+            )
+        self.assertTrue(ok, output)
+        self.assertEqual(_used_package_manager(output), "echo")
+        self.assertTrue(output.endswith("installed -- left-pad\n"), output)
+
+if __name__ == "__main__":
+    unittest.main()